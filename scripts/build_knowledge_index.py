@@ -7,10 +7,16 @@ import argparse
 import hashlib
 import html
 import json
+import os
 import re
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Sequence
 
 try:
     import yaml
@@ -19,6 +25,35 @@ except ImportError as exc:  # pragma: no cover - runtime dependency check
         "Missing dependency: pyyaml. Install with `pip install pyyaml`."
     ) from exc
 
+# libyaml-backed loader when PyYAML was built with it; same output, C speed.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Chunk digests are content identifiers, not security checks. xxh3-128 is used
+# when installed, then BLAKE3; otherwise SHA-1, which beats blake2b on SHA-NI
+# hardware.
+try:
+    from xxhash import xxh3_128 as content_hash
+
+    DIGEST_ALGORITHM = "xxh3_128"
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        from blake3 import blake3 as content_hash
+
+        DIGEST_ALGORITHM = "blake3"
+    except ImportError:
+        content_hash = hashlib.sha1
+        DIGEST_ALGORITHM = "sha1"
+
+# Records keep the original "sha1" key unless a faster algorithm is installed.
+DIGEST_FIELD = "sha1" if DIGEST_ALGORITHM == "sha1" else "digest"
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+from json_output import dump_json_bytes
+
 TEXT_EXTENSIONS = {
     ".md",
     ".markdown",
@@ -64,34 +99,40 @@ TEXT_FILENAMES = {
     "changelog.md",
 }
 
-EXCLUDED_DIRS = {
-    ".git",
-    "build",
-    "dist",
-    "node_modules",
-    "__pycache__",
-    ".pytest_cache",
-    ".mypy_cache",
-    ".ruff_cache",
-    "logs",
-    "outputs",
-}
-
-REPO_NOISE_PARTS = {
-    "thirdparty",
-    "third-party",
-    "extern",
-    "external",
-    "vendor",
-    "deps",
-    ".github",
-}
+EXCLUDED_DIRS = frozenset(
+    {
+        ".git",
+        "build",
+        "dist",
+        "node_modules",
+        "__pycache__",
+        ".pytest_cache",
+        ".mypy_cache",
+        ".ruff_cache",
+        "logs",
+        "outputs",
+    }
+)
+
+REPO_NOISE_PARTS = frozenset(
+    {
+        "thirdparty",
+        "third-party",
+        "extern",
+        "external",
+        "vendor",
+        "deps",
+        ".github",
+    }
+)
 
-REPO_NOISE_NAMES = {
-    "license",
-    "license.txt",
-    "copying",
-}
+REPO_NOISE_NAMES = frozenset(
+    {
+        "license",
+        "license.txt",
+        "copying",
+    }
+)
 
 PROJECT_ROOT_FILES = {
     "AGENTS.md",
@@ -99,103 +140,192 @@ PROJECT_ROOT_FILES = {
     "Makefile",
 }
 
+INDEX_PREVIEW_LIMIT = 1000
+BINARY_PROBE_BYTES = 2048
+READ_FLAGS = os.O_RDONLY | getattr(os, "O_NOATIME", 0)
+INDEX_CACHE_VERSION = 4
+WRITE_BUFFER_BYTES = 1024 * 1024
+POOL_CHUNKSIZE = 16
+
+FENCE_RE = re.compile(r"```.*?```", re.S)
+INLINE_CODE_RE = re.compile(r"`([^`]*)`")
+IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]+\)")
+LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+# Heading, bullet and numbered-list prefixes stay separate passes: a combined
+# pattern lets one prefix's \s+ run across a newline and hide the next line's
+# prefix from the ^ anchor.
+HEADING_PREFIX_RE = re.compile(r"^#{1,6}\s*", re.M)
+BULLET_PREFIX_RE = re.compile(r"^\s*[-*+]\s+", re.M)
+NUMBERED_PREFIX_RE = re.compile(r"^\s*\d+\.\s+", re.M)
+# Script/style blocks and remaining tags removed in a single scan.
+HTML_NOISE_RE = re.compile(r"(?is)<script.*?>.*?</script>|<style.*?>.*?</style>|<[^>]+>")
+
 
 def unique_list(values: Iterable[str]) -> list[str]:
-    out: list[str] = []
-    seen: set[str] = set()
-    for value in values:
-        item = value.strip()
-        if not item or item in seen:
-            continue
-        seen.add(item)
-        out.append(item)
-    return out
+    return list(dict.fromkeys(item for item in (value.strip() for value in values) if item))
 
 
 def load_manifest(path: Path) -> dict[str, Any]:
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+    with path.open("rb") as f:
+        data = yaml.load(f, Loader=YAML_LOADER)
     if not isinstance(data, dict):
         raise ValueError(f"Manifest must be a mapping: {path}")
     return data
 
 
 def strip_markdown(text: str) -> str:
-    text = re.sub(r"```.*?```", " ", text, flags=re.S)
-    text = re.sub(r"`([^`]*)`", r"\1", text)
-    text = re.sub(r"!\[[^\]]*\]\([^)]+\)", " ", text)
-    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
-    text = re.sub(r"^#{1,6}\s*", "", text, flags=re.M)
-    text = re.sub(r"^\s*[-*+]\s+", "", text, flags=re.M)
-    text = re.sub(r"^\s*\d+\.\s+", "", text, flags=re.M)
-    return re.sub(r"\s+", " ", text).strip()
+    text = FENCE_RE.sub(" ", text)
+    text = INLINE_CODE_RE.sub(r"\1", text)
+    text = IMAGE_RE.sub(" ", text)
+    text = LINK_RE.sub(r"\1", text)
+    text = HEADING_PREFIX_RE.sub("", text)
+    text = BULLET_PREFIX_RE.sub("", text)
+    text = NUMBERED_PREFIX_RE.sub("", text)
+    return " ".join(text.split())
 
 
 def strip_html_text(raw_html: str) -> str:
-    no_script = re.sub(r"(?is)<script.*?>.*?</script>", " ", raw_html)
-    no_style = re.sub(r"(?is)<style.*?>.*?</style>", " ", no_script)
-    no_tags = re.sub(r"(?s)<[^>]+>", " ", no_style)
-    return re.sub(r"\s+", " ", html.unescape(no_tags)).strip()
+    no_tags = HTML_NOISE_RE.sub(" ", raw_html)
+    return " ".join(html.unescape(no_tags).split())
+
 
+def has_nul_prefix(data: bytes) -> bool:
+    return data.find(b"\x00", 0, BINARY_PROBE_BYTES) != -1
 
-def is_binary_file(path: Path) -> bool:
+
+def open_for_read(path: Path) -> int:
+    # O_NOATIME (Linux) skips the access-time update on every indexed file. The
+    # kernel only allows it on files we own, so retry without it on EPERM.
     try:
-        with path.open("rb") as f:
-            chunk = f.read(2048)
-        return b"\x00" in chunk
-    except OSError:
-        return True
+        return os.open(path, READ_FLAGS)
+    except PermissionError:
+        if READ_FLAGS == os.O_RDONLY:
+            raise
+        return os.open(path, os.O_RDONLY)
 
 
-def should_index_file(path: Path, max_file_bytes: int) -> bool:
-    if not path.is_file():
-        return False
+def read_file_bytes(path: Path, size: int | None = None) -> bytes:
+    # Raw os-level read sized from the walker's stat; skips the buffered/text
+    # io stack that read_text sets up for every file.
+    fd = open_for_read(path)
     try:
-        size = path.stat().st_size
-    except OSError:
-        return False
+        if size is None:
+            size = os.fstat(fd).st_size
+        parts: list[bytes] = []
+        remaining = size
+        while remaining > 0:
+            data = os.read(fd, remaining)
+            if not data:
+                break
+            parts.append(data)
+            remaining -= len(data)
+    finally:
+        os.close(fd)
+    return parts[0] if len(parts) == 1 else b"".join(parts)
+
+
+def decode_file_text(data: bytes) -> str:
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def should_index_file(
+    path: Path,
+    max_file_bytes: int,
+    size: int | None = None,
+    lower_name: str | None = None,
+) -> bool:
+    # Name and size checks only; the NUL-byte probe runs in build_file_records
+    # on the bytes it reads anyway, so candidates are opened once.
+    if size is None:
+        if not path.is_file():
+            return False
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return False
     if size <= 0 or size > max_file_bytes:
         return False
-    suffix = path.suffix.lower()
-    if suffix in TEXT_EXTENSIONS:
-        return not is_binary_file(path)
+    if lower_name is None:
+        lower_name = path.name.lower()
+    return os.path.splitext(lower_name)[1] in TEXT_EXTENSIONS or lower_name in TEXT_FILENAMES
+
+
+def scan_files(
+    root: Path,
+    noise_parts: set[str] | frozenset[str] = frozenset(),
+    excluded_dirs: set[str] | frozenset[str] = EXCLUDED_DIRS,
+) -> Iterator[os.DirEntry[str]]:
+    # Depth-first walk in rglob order that prunes excluded directories before
+    # descending and hands back DirEntry objects so callers reuse cached stats.
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs: list[str] = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in excluded_dirs and entry.name.lower() not in noise_parts:
+                        subdirs.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+def iter_indexable_files(
+    root: Path,
+    max_file_bytes: int,
+    noise_parts: set[str] | frozenset[str] = frozenset(),
+    noise_names: set[str] | frozenset[str] = frozenset(),
+) -> Iterator[tuple[Path, os.stat_result]]:
+    for entry in scan_files(root, noise_parts):
+        lower_name = entry.name.lower()
+        if lower_name in noise_names:
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        path = Path(entry.path)
+        if should_index_file(path, max_file_bytes, st.st_size, lower_name=lower_name):
+            yield path, st
 
-    lower_name = path.name.lower()
-    if lower_name in TEXT_FILENAMES:
-        return not is_binary_file(path)
 
-    return False
+def iter_repo_files(repo_root: Path, max_file_bytes: int) -> Iterator[tuple[Path, os.stat_result]]:
+    return iter_indexable_files(repo_root, max_file_bytes, REPO_NOISE_PARTS, REPO_NOISE_NAMES)
 
 
-def iter_repo_files(repo_root: Path, max_file_bytes: int) -> Iterable[Path]:
-    for path in repo_root.rglob("*"):
-        if not path.is_file():
-            continue
-        if any(part in EXCLUDED_DIRS for part in path.parts):
-            continue
-        rel = path.relative_to(repo_root)
-        rel_parts = {part.lower() for part in rel.parts}
-        if rel_parts & REPO_NOISE_PARTS:
-            continue
-        if path.name.lower() in REPO_NOISE_NAMES:
-            continue
-        if should_index_file(path, max_file_bytes):
-            yield path
+def iter_project_files(base_dir: Path, max_file_bytes: int) -> Iterator[tuple[Path, os.stat_result]]:
+    return iter_indexable_files(base_dir, max_file_bytes)
 
 
-def iter_project_files(base_dir: Path, max_file_bytes: int) -> Iterable[Path]:
-    for path in base_dir.rglob("*"):
-        if not path.is_file():
-            continue
-        if any(part in EXCLUDED_DIRS for part in path.parts):
-            continue
-        if should_index_file(path, max_file_bytes):
-            yield path
+def iter_suffix_files(base_dir: Path, suffixes: set[str]) -> list[Path]:
+    # Docs, skills and sources were never pruned, so nothing is excluded here.
+    return sorted(
+        Path(entry.path)
+        for entry in scan_files(base_dir, excluded_dirs=frozenset())
+        if os.path.splitext(entry.name)[1].lower() in suffixes
+    )
 
 
-def infer_project_tags(rel_path: Path) -> list[str]:
-    parts = {part.lower() for part in rel_path.parts}
-    name = rel_path.name.lower()
+def infer_project_tags(rel_path: Path) -> tuple[str, ...]:
+    return _project_tags(rel_path.parent.as_posix().lower(), rel_path.name.lower())
+
+
+@lru_cache(maxsize=4096)
+def _project_tags(parent: str, name: str) -> tuple[str, ...]:
+    # Tags depend only on the directory names and the file name, so files
+    # sharing a directory reuse one computation.
+    parts = set(parent.split("/"))
+    parts.add(name)
     tags: list[str] = ["project"]
 
     if name == "agents.md":
@@ -213,35 +343,47 @@ def infer_project_tags(rel_path: Path) -> list[str]:
     if name == "benchmark_examples.json":
         tags.extend(["examples", "payload"])
 
-    return unique_list(tags)
+    return tuple(unique_list(tags))
 
 
 def chunk_text(text: str, chunk_chars: int, overlap_chars: int) -> list[str]:
-    cleaned = re.sub(r"\s+", " ", text).strip()
+    # Callers pass whitespace-collapsed text (normalize_text_by_path and the
+    # support-doc branches), so only the ends need trimming here.
+    cleaned = text.strip()
     if not cleaned:
         return []
     if len(cleaned) <= chunk_chars:
         return [cleaned]
 
-    chunks: list[str] = []
+    # The last window is the first one that reaches the end of the text.
+    # strip() returns the slice itself when there is nothing to trim, so it
+    # only costs anything on windows that land on a space.
+    n = len(cleaned)
     step = max(chunk_chars - overlap_chars, 1)
-    i = 0
-    while i < len(cleaned):
-        part = cleaned[i : i + chunk_chars].strip()
-        if part:
-            chunks.append(part)
-        if i + chunk_chars >= len(cleaned):
-            break
-        i += step
-    return chunks
+    stop = min(n, n - chunk_chars + step)
+    return [
+        part
+        for i in range(0, stop, step)
+        if (part := cleaned[i : i + chunk_chars].strip())
+    ]
+
+
+def collapse_whitespace(text: str) -> str:
+    return " ".join(text.split())
+
+
+NORMALIZER_BY_SUFFIX: dict[str, Callable[[str], str]] = {
+    ".md": strip_markdown,
+    ".markdown": strip_markdown,
+    ".html": strip_html_text,
+    ".htm": strip_html_text,
+}
 
 
-def normalize_text_by_path(path: Path, text: str) -> str:
-    if path.suffix.lower() in {".md", ".markdown"}:
-        return strip_markdown(text)
-    if path.suffix.lower() in {".html", ".htm"}:
-        return strip_html_text(text)
-    return re.sub(r"\s+", " ", text).strip()
+def normalize_text_by_path(path: Path, text: str, suffix: str | None = None) -> str:
+    if suffix is None:
+        suffix = path.suffix.lower()
+    return NORMALIZER_BY_SUFFIX.get(suffix, collapse_whitespace)(text)
 
 
 def make_record(
@@ -252,11 +394,11 @@ def make_record(
     text: str,
     path: str | None = None,
     url: str | None = None,
-    tags: list[str] | None = None,
+    tags: Sequence[str] | None = None,
     rank: int | None = None,
     total_chunks: int | None = None,
 ) -> dict[str, Any]:
-    digest = hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+    digest = content_hash(text.encode("utf-8", errors="ignore")).hexdigest()
     payload: dict[str, Any] = {
         "id": rec_id,
         "title": title,
@@ -266,7 +408,7 @@ def make_record(
         "tags": tags or [],
         "content": text,
         "content_chars": len(text),
-        "sha1": digest,
+        DIGEST_FIELD: digest,
     }
     if rank is not None:
         payload["chunk_rank"] = rank
@@ -279,12 +421,246 @@ def read_json(path: Path) -> dict[str, Any]:
     if not path.exists():
         return {}
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        raw = path.read_bytes()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
     except json.JSONDecodeError:
         return {}
     return data if isinstance(data, dict) else {}
 
 
+PreviewRow = tuple[str, str, str, Sequence[str], str]
+FileResult = tuple[str, list[bytes], list[PreviewRow] | None]
+
+
+@dataclass(frozen=True)
+class FileTask:
+    path: Path
+    rec_prefix: str
+    source_type: str
+    tags: tuple[str, ...]
+    url: str | None
+    chunk_chars: int
+    overlap_chars: int
+    path_value: str | None = None
+    size: int | None = None
+    mtime_ns: int | None = None
+
+
+def serialize_record(rec: dict[str, Any]) -> bytes:
+    # One newline-terminated JSONL line. The stdlib fallback matches orjson's
+    # compact, non-ASCII-preserving output.
+    if orjson is not None:
+        return orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def preview_row(rec: dict[str, Any]) -> PreviewRow:
+    return (rec["id"], rec["source_type"], rec["title"], rec.get("tags", []), rec.get("path") or "")
+
+
+def build_file_records(task: FileTask) -> list[dict[str, Any]]:
+    path = task.path
+    try:
+        data = read_file_bytes(path, task.size)
+    except OSError:
+        return []
+    if has_nul_prefix(data):
+        return []
+    suffix = path.suffix.lower()
+    raw_text = decode_file_text(data)
+    normalized = normalize_text_by_path(path, raw_text, suffix)
+    chunks = chunk_text(normalized, task.chunk_chars, task.overlap_chars)
+    return [
+        make_record(
+            rec_id=f"{task.rec_prefix}:chunk-{idx:04d}",
+            title=path.name,
+            source_type=task.source_type,
+            text=chunk,
+            path=task.path_value or str(path),
+            url=task.url,
+            tags=task.tags,
+            rank=idx,
+            total_chunks=len(chunks),
+        )
+        for idx, chunk in enumerate(chunks)
+    ]
+
+
+def process_file_task(task: FileTask) -> FileResult:
+    # Runs in worker processes: read, normalize, chunk, hash and serialize so the
+    # parent only has to write finished lines.
+    records = build_file_records(task)
+    return (
+        task.source_type,
+        [serialize_record(rec) for rec in records],
+        [preview_row(rec) for rec in records],
+    )
+
+
+class IndexCache:
+    # Per-file spans of the previous JSONL index, reused while a file's
+    # size/mtime and the task that produced its records are unchanged. Only
+    # byte offsets are kept; the lines themselves are copied from the previous
+    # index, which must still be the file the cache was saved against.
+
+    def __init__(self, files: dict[str, Any] | None = None, previous_index: BinaryIO | None = None) -> None:
+        self.previous: dict[str, Any] = files or {}
+        self.previous_index = previous_index
+        self.current: dict[str, Any] = {}
+        self.stamps: dict[str, list[int]] = {}
+        self.counts: Counter[str] = Counter()
+
+    @classmethod
+    def load(cls, path: Path, index_path: Path) -> IndexCache:
+        payload = read_json(path)
+        if payload.get("version") != INDEX_CACHE_VERSION:
+            return cls()
+        if payload.get("digest_algorithm") != DIGEST_ALGORITHM:
+            return cls()
+        files = payload.get("files")
+        if not isinstance(files, dict):
+            return cls()
+        try:
+            previous_index = index_path.open("rb")
+        except OSError:
+            return cls()
+        st = os.fstat(previous_index.fileno())
+        if payload.get("index_stamp") != [st.st_size, st.st_mtime_ns]:
+            previous_index.close()
+            return cls()
+        return cls(files, previous_index)
+
+    @staticmethod
+    def task_key(task: FileTask) -> list[Any]:
+        return [
+            task.rec_prefix,
+            task.source_type,
+            list(task.tags),
+            task.url,
+            task.chunk_chars,
+            task.overlap_chars,
+            task.path_value,
+        ]
+
+    def _read_lines(self, span: Any) -> list[bytes] | None:
+        if self.previous_index is None or not isinstance(span, list) or len(span) != 3:
+            return None
+        offset, length, count = span
+        self.previous_index.seek(offset)
+        data = self.previous_index.read(length)
+        if len(data) != length or data.count(b"\n") != count or (count and not data.endswith(b"\n")):
+            return None
+        return data.splitlines(keepends=True)
+
+    def lookup(self, task: FileTask) -> FileResult | None:
+        key = str(task.path)
+        if task.size is not None and task.mtime_ns is not None:
+            stamp = [task.size, task.mtime_ns]
+        else:
+            try:
+                st = os.stat(task.path)
+            except OSError:
+                return None
+            stamp = [st.st_size, st.st_mtime_ns]
+        self.stamps[key] = stamp
+        entry = self.previous.get(key)
+        if entry is None:
+            self.counts["added"] += 1
+            return None
+        if entry.get("stamp") == stamp and entry.get("task") == self.task_key(task):
+            lines = self._read_lines(entry.get("span"))
+            if lines is not None:
+                self.counts["unchanged"] += 1
+                return (task.source_type, lines, None)
+        self.counts["updated"] += 1
+        return None
+
+    def record(self, task: FileTask, offset: int, length: int, count: int) -> None:
+        # Where this file's lines landed in the new index.
+        key = str(task.path)
+        stamp = self.stamps.pop(key, None)
+        if stamp is not None:
+            self.current[key] = {"stamp": stamp, "task": self.task_key(task), "span": [offset, length, count]}
+
+    def close(self) -> None:
+        if self.previous_index is not None:
+            self.previous_index.close()
+            self.previous_index = None
+
+    def save(self, path: Path, index_path: Path) -> None:
+        self.counts["removed"] = len(self.previous.keys() - self.current.keys())
+        st = index_path.stat()
+        payload = {
+            "version": INDEX_CACHE_VERSION,
+            "digest_algorithm": DIGEST_ALGORITHM,
+            "index_stamp": [st.st_size, st.st_mtime_ns],
+            "files": self.current,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if orjson is not None:
+            path.write_bytes(orjson.dumps(payload))
+        else:
+            path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+class IndexWriter:
+    # Streams records straight to the JSONL index and keeps only the counters
+    # and capped preview needed for the markdown/meta summaries.
+
+    def __init__(
+        self,
+        out: BinaryIO,
+        mapper: Callable[..., Iterable[Any]] = map,
+        preview_limit: int = INDEX_PREVIEW_LIMIT,
+        cache: IndexCache | None = None,
+    ) -> None:
+        self.out = out
+        self.mapper = mapper
+        self.cache = cache
+        self.preview_limit = preview_limit
+        self.total = 0
+        self.offset = 0
+        self.stats_by_type: Counter[str] = Counter()
+        self.preview: list[PreviewRow] = []
+
+    def write(self, rec: dict[str, Any]) -> None:
+        self.write_batch(rec["source_type"], [serialize_record(rec)], [preview_row(rec)])
+
+    def write_batch(self, source_type: str, lines: list[bytes], previews: list[PreviewRow] | None) -> None:
+        # previews is None for cached lines; they are parsed only while the
+        # preview still has room.
+        if not lines:
+            return
+        data = b"".join(lines)
+        self.out.write(data)
+        self.offset += len(data)
+        self.total += len(lines)
+        self.stats_by_type[source_type] += len(lines)
+        room = self.preview_limit - len(self.preview)
+        if room > 0:
+            if previews is None:
+                loads = orjson.loads if orjson is not None else json.loads
+                previews = [preview_row(loads(line)) for line in lines[:room]]
+            self.preview.extend(previews[:room])
+
+    def add_files(self, tasks: Iterable[FileTask]) -> None:
+        # mapper preserves input order, so record order matches a serial run.
+        if self.cache is None:
+            for result in self.mapper(process_file_task, tasks):
+                self.write_batch(*result)
+            return
+
+        cache = self.cache
+        tasks = list(tasks)
+        hits = [cache.lookup(task) for task in tasks]
+        fresh = iter(self.mapper(process_file_task, [t for t, hit in zip(tasks, hits) if hit is None]))
+        for task, hit in zip(tasks, hits):
+            result = hit if hit is not None else next(fresh)
+            start = self.offset
+            self.write_batch(*result)
+            cache.record(task, start, self.offset - start, len(result[1]))
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Build local Unitree knowledge index")
     parser.add_argument(
@@ -365,6 +741,17 @@ def parse_args() -> argparse.Namespace:
         default=Path("data/index/knowledge_index.meta.json"),
         help="Output metadata summary file",
     )
+    parser.add_argument(
+        "--index-cache",
+        type=Path,
+        default=Path("data/index/knowledge_index.cache.json"),
+        help="Per-file record cache reused for unchanged files on the next run",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the index cache and re-process every file",
+    )
     parser.add_argument(
         "--max-file-bytes",
         type=int,
@@ -383,47 +770,16 @@ def parse_args() -> argparse.Namespace:
         default=220,
         help="Overlap between chunks",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes for file normalization (0=CPU count minus one, 1=serial)",
+    )
     return parser.parse_args()
 
 
-def add_file_records(
-    records: list[dict[str, Any]],
-    path: Path,
-    rec_prefix: str,
-    source_type: str,
-    tags: list[str],
-    url: str | None,
-    chunk_chars: int,
-    overlap_chars: int,
-    path_value: str | None = None,
-) -> None:
-    raw_text = path.read_text(encoding="utf-8", errors="replace")
-    normalized = normalize_text_by_path(path, raw_text)
-    chunks = chunk_text(normalized, chunk_chars, overlap_chars)
-    if not chunks:
-        return
-    for idx, chunk in enumerate(chunks):
-        rec_id = f"{rec_prefix}:chunk-{idx:04d}"
-        records.append(
-            make_record(
-                rec_id=rec_id,
-                title=path.name,
-                source_type=source_type,
-                text=chunk,
-                path=path_value or str(path),
-                url=url,
-                tags=tags,
-                rank=idx,
-                total_chunks=len(chunks),
-            )
-        )
-
-
-def main() -> int:
-    args = parse_args()
-    manifest = load_manifest(args.manifest)
-    records: list[dict[str, Any]] = []
-
+def write_index_records(args: argparse.Namespace, manifest: dict[str, Any], writer: IndexWriter) -> None:
     # Repositories: index all relevant text/code files, chunked.
     for repo in manifest.get("repos", []):
         name = str(repo["name"])
@@ -432,42 +788,59 @@ def main() -> int:
             continue
 
         repo_url = str(repo.get("url", ""))
-        tags = list(repo.get("topics", [])) + [name]
-        for file_path in iter_repo_files(repo_dir, args.max_file_bytes):
-            rel = file_path.relative_to(repo_dir)
-            rec_prefix = f"repo:{name}:{rel.as_posix()}"
-            add_file_records(
-                records=records,
+        tags = (*repo.get("topics", []), name)
+        writer.add_files(
+            FileTask(
                 path=file_path,
-                rec_prefix=rec_prefix,
+                rec_prefix=f"repo:{name}:{file_path.relative_to(repo_dir).as_posix()}",
                 source_type="repo_file",
                 tags=tags,
                 url=repo_url,
                 chunk_chars=args.chunk_chars,
                 overlap_chars=args.overlap_chars,
+                size=st.st_size,
+                mtime_ns=st.st_mtime_ns,
             )
+            for file_path, st in iter_repo_files(repo_dir, args.max_file_bytes)
+        )
 
-    # Support docs: prefer rendered text/html when available.
+    # Support docs: prefer rendered text/html when available. The snapshot
+    # directory is listed once instead of stat'ing five candidates per doc.
+    try:
+        support_names = set(os.listdir(args.support_dir))
+    except OSError:
+        support_names = set()
     for doc in manifest.get("support_docs", []):
         doc_id = str(doc["id"])
+        has_html = f"{doc_id}.html" in support_names
+        has_rendered_txt = f"{doc_id}.rendered.txt" in support_names
+        has_rendered_html = f"{doc_id}.rendered.html" in support_names
+        if not has_html and not has_rendered_txt and not has_rendered_html:
+            continue
+
         html_path = args.support_dir / f"{doc_id}.html"
         rendered_txt = args.support_dir / f"{doc_id}.rendered.txt"
         rendered_html = args.support_dir / f"{doc_id}.rendered.html"
-        rendered_meta = read_json(args.support_dir / f"{doc_id}.rendered.json")
-        raw_meta = read_json(args.support_dir / f"{doc_id}.json")
+        rendered_meta = (
+            read_json(args.support_dir / f"{doc_id}.rendered.json")
+            if f"{doc_id}.rendered.json" in support_names
+            else {}
+        )
+        raw_meta = (
+            read_json(args.support_dir / f"{doc_id}.json")
+            if f"{doc_id}.json" in support_names
+            else {}
+        )
         verification_status = str(
             rendered_meta.get("status")
             or raw_meta.get("status")
             or "unknown"
         )
 
-        if not html_path.exists() and not rendered_txt.exists() and not rendered_html.exists():
-            continue
-
-        if rendered_txt.exists() and verification_status == "verified":
-            text = rendered_txt.read_text(encoding="utf-8", errors="replace")
+        if has_rendered_txt and verification_status == "verified":
+            text = " ".join(rendered_txt.read_text(encoding="utf-8", errors="replace").split())
             source_path = rendered_txt
-        elif rendered_html.exists() and verification_status == "verified":
+        elif has_rendered_html and verification_status == "verified":
             raw_html = rendered_html.read_text(encoding="utf-8", errors="replace")
             text = strip_html_text(raw_html)
             source_path = rendered_html
@@ -476,25 +849,28 @@ def main() -> int:
             text = strip_html_text(raw_html)
             source_path = html_path
 
-        tags = list(doc.get("topics", [])) + ["support", verification_status]
+        tags: tuple[str, ...] = (*doc.get("topics", []), "support", verification_status)
         if verification_status != "verified" or len(text) < 60:
             text = (
                 "UNVERIFIED SUPPORT PAGE. Raw content is unavailable or blocked in this "
                 "environment. Use the source URL directly or re-run verification from an "
                 "allowed network."
             )
-            tags.append("support_unverified")
+            tags = (*tags, "support_unverified")
 
         chunks = chunk_text(text, args.chunk_chars, args.overlap_chars)
+        title = str(doc.get("title", doc_id))
+        path_value = str(source_path)
+        url = str(doc.get("url", ""))
         for idx, chunk in enumerate(chunks):
-            records.append(
+            writer.write(
                 make_record(
                     rec_id=f"support:{doc_id}:chunk-{idx:04d}",
-                    title=str(doc.get("title", doc_id)),
+                    title=title,
                     source_type="support_doc",
                     text=chunk,
-                    path=str(source_path),
-                    url=str(doc.get("url", "")),
+                    path=path_value,
+                    url=url,
                     tags=tags,
                     rank=idx,
                     total_chunks=len(chunks),
@@ -503,72 +879,69 @@ def main() -> int:
 
     # Curated docs and pipeline docs.
     if args.docs_dir.exists():
-        for doc_path in sorted(args.docs_dir.rglob("*.md")):
-            if doc_path.name.lower().startswith("readme"):
-                continue
-            rel = doc_path.relative_to(args.docs_dir).as_posix()
-            add_file_records(
-                records=records,
+        writer.add_files(
+            FileTask(
                 path=doc_path,
-                rec_prefix=f"doc:{rel}",
+                rec_prefix=f"doc:{doc_path.relative_to(args.docs_dir).as_posix()}",
                 source_type="curated_doc",
-                tags=["doc", "curated"],
+                tags=("doc", "curated"),
                 url=None,
                 chunk_chars=args.chunk_chars,
                 overlap_chars=args.overlap_chars,
             )
+            for doc_path in iter_suffix_files(args.docs_dir, {".md"})
+            if not doc_path.name.lower().startswith("readme")
+        )
 
     # Skill instructions as explicit agent-facing data.
     if args.skills_dir.exists():
-        for skill_path in sorted(args.skills_dir.rglob("*.md")):
-            rel = skill_path.relative_to(args.skills_dir).as_posix()
-            add_file_records(
-                records=records,
+        writer.add_files(
+            FileTask(
                 path=skill_path,
-                rec_prefix=f"skill:{rel}",
+                rec_prefix=f"skill:{skill_path.relative_to(args.skills_dir).as_posix()}",
                 source_type="skill_doc",
-                tags=["skill", "agent"],
+                tags=("skill", "agent"),
                 url=None,
                 chunk_chars=args.chunk_chars,
                 overlap_chars=args.overlap_chars,
             )
+            for skill_path in iter_suffix_files(args.skills_dir, {".md"})
+        )
 
     # Source manifests/catalogs.
     if args.sources_dir.exists():
-        for source_path in sorted(args.sources_dir.rglob("*")):
-            if source_path.suffix.lower() not in {".yaml", ".yml", ".json", ".md"}:
-                continue
-            if not source_path.is_file():
-                continue
-            rel = source_path.relative_to(args.sources_dir).as_posix()
-            add_file_records(
-                records=records,
+        writer.add_files(
+            FileTask(
                 path=source_path,
-                rec_prefix=f"source:{rel}",
+                rec_prefix=f"source:{source_path.relative_to(args.sources_dir).as_posix()}",
                 source_type="source_manifest",
-                tags=["source", "manifest"],
+                tags=("source", "manifest"),
                 url=None,
                 chunk_chars=args.chunk_chars,
                 overlap_chars=args.overlap_chars,
             )
+            for source_path in iter_suffix_files(args.sources_dir, {".yaml", ".yml", ".json", ".md"})
+        )
 
     # Project-level governance and evaluation files for codex-centric queries.
     project_root = args.project_root.resolve()
+    project_tasks: list[FileTask] = []
     for root_name in sorted(PROJECT_ROOT_FILES):
         root_path = project_root / root_name
         if not should_index_file(root_path, args.max_file_bytes):
             continue
         rel = root_path.relative_to(project_root)
-        add_file_records(
-            records=records,
-            path=root_path,
-            rec_prefix=f"project:{rel.as_posix()}",
-            source_type="project_doc",
-            tags=infer_project_tags(rel),
-            url=None,
-            chunk_chars=args.chunk_chars,
-            overlap_chars=args.overlap_chars,
-            path_value=rel.as_posix(),
+        project_tasks.append(
+            FileTask(
+                path=root_path,
+                rec_prefix=f"project:{rel.as_posix()}",
+                source_type="project_doc",
+                tags=infer_project_tags(rel),
+                url=None,
+                chunk_chars=args.chunk_chars,
+                overlap_chars=args.overlap_chars,
+                path_value=rel.as_posix(),
+            )
         )
 
     project_dirs: list[tuple[Path, str]] = [
@@ -584,62 +957,88 @@ def main() -> int:
         )
         if not base_dir.exists():
             continue
-        for path in iter_project_files(base_dir, args.max_file_bytes):
+        for path, st in iter_project_files(base_dir, args.max_file_bytes):
             rel = path.relative_to(project_root)
             tags = infer_project_tags(rel)
-            if "data" in {part.lower() for part in rel.parts} and source_type == "site_doc":
+            if source_type == "site_doc" and "data" in map(str.lower, rel.parts):
                 source_type_value = "site_data"
             else:
                 source_type_value = source_type
-            add_file_records(
-                records=records,
-                path=path,
-                rec_prefix=f"project:{rel.as_posix()}",
-                source_type=source_type_value,
-                tags=tags,
-                url=None,
-                chunk_chars=args.chunk_chars,
-                overlap_chars=args.overlap_chars,
-                path_value=rel.as_posix(),
+            project_tasks.append(
+                FileTask(
+                    path=path,
+                    rec_prefix=f"project:{rel.as_posix()}",
+                    source_type=source_type_value,
+                    tags=tags,
+                    url=None,
+                    chunk_chars=args.chunk_chars,
+                    overlap_chars=args.overlap_chars,
+                    path_value=rel.as_posix(),
+                    size=st.st_size,
+                    mtime_ns=st.st_mtime_ns,
+                )
             )
+    writer.add_files(project_tasks)
+
+
+def main() -> int:
+    args = parse_args()
+    manifest = load_manifest(args.manifest)
+
+    # Leave a core for the parent, which walks the trees and writes the index.
+    workers = args.workers if args.workers > 0 else max(1, (os.cpu_count() or 1) - 1)
 
+    cache = IndexCache() if args.full else IndexCache.load(args.index_cache, args.index_jsonl)
+
+    # Cached files are copied out of the previous index, so the new one is
+    # written beside it and only swapped in once complete.
     args.index_jsonl.parent.mkdir(parents=True, exist_ok=True)
-    with args.index_jsonl.open("w", encoding="utf-8") as f:
-        for rec in records:
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    partial_index = args.index_jsonl.with_name(args.index_jsonl.name + ".part")
+    try:
+        with partial_index.open("wb", buffering=WRITE_BUFFER_BYTES) as f:
+            with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as pool:
+                mapper = partial(pool.map, chunksize=POOL_CHUNKSIZE) if pool else map
+                writer = IndexWriter(f, mapper=mapper, cache=cache)
+                write_index_records(args, manifest, writer)
+        partial_index.replace(args.index_jsonl)
+    finally:
+        cache.close()
+        partial_index.unlink(missing_ok=True)
+    cache.save(args.index_cache, args.index_jsonl)
 
     with args.index_markdown.open("w", encoding="utf-8") as f:
         f.write("# Unitree G1 Local Knowledge Index\n\n")
-        f.write(f"- Records: {len(records)}\n\n")
+        f.write(f"- Records: {writer.total}\n\n")
         f.write("| ID | Type | Title | Tags | Path |\n")
         f.write("| --- | --- | --- | --- | --- |\n")
-        for rec in records[:1000]:
-            preview_tags = ",".join(rec.get("tags", []))
-            path = rec.get("path", "") or ""
+        for rec_id, source_type, title, tags, path in writer.preview:
+            preview_tags = ",".join(tags)
             f.write(
-                f"| {rec['id']} | {rec['source_type']} | {rec['title']} | "
+                f"| {rec_id} | {source_type} | {title} | "
                 f"{preview_tags} | {path} |\n"
             )
 
-    stats_by_type: dict[str, int] = {}
-    for rec in records:
-        stats_by_type[rec["source_type"]] = stats_by_type.get(rec["source_type"], 0) + 1
-
     meta = {
-        "records": len(records),
-        "by_source_type": stats_by_type,
+        "records": writer.total,
+        "by_source_type": dict(writer.stats_by_type),
         "manifest": str(args.manifest),
         "repos_indexed": len(manifest.get("repos", [])),
         "support_docs_indexed": len(manifest.get("support_docs", [])),
         "max_file_bytes": args.max_file_bytes,
         "chunk_chars": args.chunk_chars,
         "overlap_chars": args.overlap_chars,
+        "digest_algorithm": DIGEST_ALGORITHM,
     }
-    args.index_meta.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    args.index_meta.write_bytes(dump_json_bytes(meta))
 
     print(f"[OK] Wrote index JSONL: {args.index_jsonl}")
     print(f"[OK] Wrote index summary: {args.index_markdown}")
     print(f"[OK] Wrote index meta: {args.index_meta}")
+    print(
+        f"[OK] Index cache: {cache.counts['unchanged']} unchanged, "
+        f"{cache.counts['updated']} updated, {cache.counts['added']} added, "
+        f"{cache.counts['removed']} removed"
+    )
     return 0
 
 
@@ -11,6 +11,10 @@ try:
 except ImportError as exc:  # pragma: no cover
     raise SystemExit("Missing dependency: pyyaml. Install with `pip install pyyaml`.") from exc
 
+# libyaml-backed loader/dumper when PyYAML was built with it; same output, C speed.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Build retrieval benchmark from question bank")
@@ -37,7 +41,7 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> int:
     args = parse_args()
-    payload = yaml.safe_load(args.input.read_text(encoding="utf-8"))
+    payload = yaml.load(args.input.read_bytes(), Loader=YAML_LOADER)
     if not isinstance(payload, dict):
         raise ValueError("Invalid question bank format")
 
@@ -69,7 +73,7 @@ def main() -> int:
     }
 
     args.output.parent.mkdir(parents=True, exist_ok=True)
-    args.output.write_text(yaml.safe_dump(out, sort_keys=False), encoding="utf-8")
+    args.output.write_text(yaml.dump(out, Dumper=YAML_DUMPER, sort_keys=False), encoding="utf-8")
     print(f"[OK] Wrote benchmark YAML: {args.output}")
     print(f"[SUMMARY] cases={len(cases)}")
     return 0
@@ -8,6 +8,8 @@ import json
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Any
 
@@ -18,9 +20,12 @@ except ImportError as exc:  # pragma: no cover - runtime dependency check
         "Missing dependency: pyyaml. Install with `pip install pyyaml`."
     ) from exc
 
+# libyaml-backed loader when PyYAML was built with it; same output, C speed.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_manifest(path: Path) -> dict[str, Any]:
-    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    data = yaml.load(path.read_bytes(), Loader=YAML_LOADER)
     if not isinstance(data, dict):
         raise ValueError(f"Manifest must be a mapping: {path}")
     return data
@@ -57,10 +62,11 @@ def collect_repo(repo: dict[str, Any], repos_dir: Path, mirrors_dir: Path) -> di
     }
 
     if payload["worktree_present"]:
-        payload["head_commit"] = optional_git_output(["git", "-C", str(worktree), "rev-parse", "HEAD"])
-        payload["head_commit_time"] = optional_git_output(
-            ["git", "-C", str(worktree), "show", "-s", "--format=%cI", "HEAD"]
-        )
+        # Commit hash and commit time from a single git process.
+        head = optional_git_output(["git", "-C", str(worktree), "show", "-s", "--format=%H%n%cI", "HEAD"])
+        head_commit, _, head_commit_time = head.partition("\n")
+        payload["head_commit"] = head_commit
+        payload["head_commit_time"] = head_commit_time
         payload["remote_origin"] = optional_git_output(
             ["git", "-C", str(worktree), "remote", "get-url", "origin"]
         )
@@ -106,6 +112,12 @@ def parse_args() -> argparse.Namespace:
         default=Path("docs/verification/repo_lock.md"),
         help="Output Markdown report path",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Repos inspected concurrently (git subprocesses run in parallel)",
+    )
     return parser.parse_args()
 
 
@@ -117,7 +129,9 @@ def main() -> int:
     if not isinstance(repos, list):
         raise ValueError("manifest repos must be a list")
 
-    entries = [collect_repo(repo, args.repos_dir, args.mirrors_dir) for repo in repos]
+    collect = partial(collect_repo, repos_dir=args.repos_dir, mirrors_dir=args.mirrors_dir)
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        entries = list(pool.map(collect, repos))
 
     report = {
         "manifest": str(args.manifest),
@@ -6,6 +6,7 @@ from __future__ import annotations
 import argparse
 import json
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -16,6 +17,18 @@ except ImportError as exc:  # pragma: no cover - runtime dependency check
         "Missing dependency: pyyaml. Install with `pip install pyyaml`."
     ) from exc
 
+# libyaml-backed loader when PyYAML was built with it; same output, C speed.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+from json_output import dump_json_bytes
+
+WRITE_BUFFER_BYTES = 1024 * 1024
+
 
 EXAMPLE_CASE_ORDER = [
     "g1_remote_vs_onboard",
@@ -202,16 +215,20 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+@lru_cache(maxsize=32)
 def read_json(path: Path) -> dict[str, Any]:
+    # Memoized: the ollama eval reports feed both the eval summaries and the
+    # benchmark examples. Callers treat the returned payloads as read-only.
     if not path.exists():
         return {}
-    return json.loads(path.read_text(encoding="utf-8"))
+    raw = path.read_bytes()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
 
 
 def read_yaml(path: Path) -> dict[str, Any]:
     if not path.exists():
         return {}
-    payload = yaml.safe_load(path.read_text(encoding="utf-8"))
+    payload = yaml.load(path.read_bytes(), Loader=YAML_LOADER)
     return payload if isinstance(payload, dict) else {}
 
 
@@ -404,40 +421,57 @@ def build_benchmark_examples(
     }
 
 
+def write_search_index(index_jsonl: Path, out_path: Path, max_records: int) -> int:
+    # Streams trimmed records straight to disk instead of holding them all for
+    # one json.dumps; the bytes match json.dumps(site_index, ensure_ascii=False).
+    # json.dumps with non-default options builds a fresh encoder per call.
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    loads = orjson.loads if orjson is not None else json.loads
+    count = 0
+    # Written to a .part file and moved into place, so a failure partway
+    # through never leaves a truncated search-index.json behind.
+    partial_out = out_path.with_name(out_path.name + ".part")
+    try:
+        with partial_out.open("w", encoding="utf-8", buffering=WRITE_BUFFER_BYTES) as out:
+            write = out.write
+            write('{"records": [')
+            if index_jsonl.exists():
+                with index_jsonl.open("rb") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        rec = loads(line)
+                        if count:
+                            write(", ")
+                        write(
+                            encode(
+                                {
+                                    "id": rec.get("id"),
+                                    "title": rec.get("title"),
+                                    "type": rec.get("source_type"),
+                                    "path": rec.get("path"),
+                                    "url": rec.get("url"),
+                                    "tags": rec.get("tags", []),
+                                    "content": str(rec.get("content", ""))[:900],
+                                }
+                            )
+                        )
+                        count += 1
+                        if count >= max_records:
+                            break
+            write(f'], "record_count": {count}}}')
+        partial_out.replace(out_path)
+    finally:
+        partial_out.unlink(missing_ok=True)
+    return count
+
+
 def main() -> int:
     args = parse_args()
     args.out_dir.mkdir(parents=True, exist_ok=True)
 
-    records: list[dict[str, Any]] = []
-    if args.index_jsonl.exists():
-        with args.index_jsonl.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                rec = json.loads(line)
-                records.append(
-                    {
-                        "id": rec.get("id"),
-                        "title": rec.get("title"),
-                        "type": rec.get("source_type"),
-                        "path": rec.get("path"),
-                        "url": rec.get("url"),
-                        "tags": rec.get("tags", []),
-                        "content": str(rec.get("content", ""))[:900],
-                    }
-                )
-                if len(records) >= args.max_records:
-                    break
-
-    site_index = {
-        "records": records,
-        "record_count": len(records),
-    }
-    (args.out_dir / "search-index.json").write_text(
-        json.dumps(site_index, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    write_search_index(args.index_jsonl, args.out_dir / "search-index.json", args.max_records)
 
     meta = read_json(args.index_meta)
     manifest = read_yaml(args.manifest)
@@ -574,20 +608,14 @@ def main() -> int:
             },
         },
     }
-    (args.out_dir / "overview.json").write_text(
-        json.dumps(overview, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    (args.out_dir / "overview.json").write_bytes(dump_json_bytes(overview, ensure_ascii=False))
 
     examples_payload = build_benchmark_examples(
         retrieval_path=args.ollama_retrieval_eval_json,
         agent_path=args.ollama_agent_eval_json,
         question_bank_path=args.ollama_question_bank_yaml,
     )
-    (args.out_dir / "benchmark_examples.json").write_text(
-        json.dumps(examples_payload, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    (args.out_dir / "benchmark_examples.json").write_bytes(dump_json_bytes(examples_payload, ensure_ascii=False))
 
     print(f"[OK] Wrote site search index: {args.out_dir / 'search-index.json'}")
     print(f"[OK] Wrote site overview: {args.out_dir / 'overview.json'}")
@@ -5,8 +5,11 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 from urllib import error as urlerror
@@ -19,6 +22,17 @@ except ImportError as exc:  # pragma: no cover - runtime dependency check
         "Missing dependency: pyyaml. Install with `pip install pyyaml`."
     ) from exc
 
+# libyaml-backed loader/dumper when PyYAML was built with it; same output, C speed.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+from json_output import dump_json_bytes
+
 
 DEFAULT_KEYWORDS = [
     "g1",
@@ -50,22 +64,155 @@ CORE_REPO_HINTS = {
 }
 
 
-def fetch_json(url: str) -> Any:
-    req = urlrequest.Request(
-        url,
-        headers={
-            "Accept": "application/vnd.github+json",
-            "User-Agent": "unitree-g1-doc-repo-discovery/1.0",
-        },
-    )
-    with urlrequest.urlopen(req, timeout=30) as response:
-        payload = response.read()
-    return json.loads(payload.decode("utf-8", errors="replace"))
+TOPIC_KEYWORDS = {
+    "sdk": "sdk",
+    "ros": "ros",
+    "rl": "rl",
+    "sim": "simulation",
+    "isaac": "isaaclab",
+    "mujoco": "mujoco",
+    "dds": "dds",
+    "g1": "g1",
+    "humanoid": "humanoid",
+    "teleoperate": "teleoperation",
+    "reality": "deployment",
+    "real": "deployment",
+    "camera": "sensor",
+    "lidar": "sensor",
+}
+TOPIC_COUNT = len(set(TOPIC_KEYWORDS.values()))
+
+GRAPHQL_REPOS_QUERY = """
+query($org: String!, $cursor: String) {
+  organization(login: $org) {
+    repositories(first: 100, after: $cursor) {
+      nodes { name description url defaultBranchRef { name } pushedAt isArchived isPrivate }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+
+def fetch_json(url: str, cached: dict[str, Any] | None = None) -> tuple[Any, str]:
+    # Conditional GET: a 304 for a known ETag returns the cached page body and
+    # does not count against the GitHub API rate limit.
+    headers = {
+        "Accept": "application/vnd.github+json",
+        "User-Agent": "unitree-g1-doc-repo-discovery/1.0",
+    }
+    cached = cached or {}
+    etag = str(cached.get("etag") or "")
+    if etag and "data" in cached:
+        headers["If-None-Match"] = etag
+    req = urlrequest.Request(url, headers=headers)
+    try:
+        with urlrequest.urlopen(req, timeout=30) as response:
+            payload = response.read()
+            etag = response.headers.get("ETag") or ""
+    except urlerror.HTTPError as exc:
+        if exc.code == 304 and "data" in cached:
+            return cached["data"], etag
+        raise
+    text = payload.decode("utf-8", errors="replace")
+    data = orjson.loads(text) if orjson is not None else json.loads(text)
+    return data, etag
+
+
+def fetch_graphql_repos(org: str, token: str, max_pages: int) -> list[dict[str, Any]]:
+    # GraphQL returns the org listing in cursor-paged requests of 100; nodes are
+    # reshaped into the REST fields to_repo_entry() reads.
+    repos: list[dict[str, Any]] = []
+    cursor: str | None = None
+    for _ in range(max_pages):
+        body = {"query": GRAPHQL_REPOS_QUERY, "variables": {"org": org, "cursor": cursor}}
+        req = urlrequest.Request(
+            "https://api.github.com/graphql",
+            data=json.dumps(body).encode("utf-8"),
+            headers={
+                "Authorization": f"bearer {token}",
+                "Content-Type": "application/json",
+                "User-Agent": "unitree-g1-doc-repo-discovery/1.0",
+            },
+        )
+        with urlrequest.urlopen(req, timeout=30) as response:
+            raw = response.read()
+        payload = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        if payload.get("errors"):
+            raise ValueError(f"GraphQL errors: {payload['errors']}")
+        listing = ((payload.get("data") or {}).get("organization") or {}).get("repositories") or {}
+        for node in listing.get("nodes") or []:
+            branch_ref = node.get("defaultBranchRef") or {}
+            repos.append(
+                {
+                    "name": node.get("name", ""),
+                    "description": node.get("description"),
+                    "html_url": node.get("url", ""),
+                    "default_branch": branch_ref.get("name") or "main",
+                    "archived": bool(node.get("isArchived", False)),
+                    "private": bool(node.get("isPrivate", False)),
+                    "pushed_at": node.get("pushedAt"),
+                }
+            )
+        page_info = listing.get("pageInfo") or {}
+        if not page_info.get("hasNextPage"):
+            break
+        cursor = page_info.get("endCursor")
+    return repos
+
+
+def fetch_rest_repos(args: argparse.Namespace) -> list[dict[str, Any]]:
+    # Pages are fetched speculatively in parallel, then merged in page order up
+    # to the first failed or empty page, exactly as the serial walk did.
+    urls = [
+        f"https://api.github.com/orgs/{args.org}/repos?per_page=100&page={page}"
+        for page in range(1, args.max_pages + 1)
+    ]
+    etag_cache = {} if args.no_etag_cache else read_etag_cache(args.etag_cache)
+    fresh_cache: dict[str, Any] = {}
+    all_repos_raw: list[dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=max(1, len(urls))) as pool:
+        futures = [pool.submit(fetch_json, url, etag_cache.get(url)) for url in urls]
+        for page, (url, future) in enumerate(zip(urls, futures), start=1):
+            try:
+                data, etag = future.result()
+            except urlerror.URLError as exc:
+                print(f"[ERROR] Failed to fetch page {page}: {exc}")
+                break
+
+            if etag:
+                fresh_cache[url] = {"etag": etag, "data": data}
+            if not isinstance(data, list) or not data:
+                break
+            all_repos_raw.extend(data)
+
+    if not args.no_etag_cache:
+        write_etag_cache(args.etag_cache, fresh_cache)
+    return all_repos_raw
+
+
+def read_etag_cache(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {}
+    try:
+        raw = path.read_bytes()
+        payload = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def write_etag_cache(path: Path, pages: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(pages))
+    else:
+        path.write_text(json.dumps(pages, ensure_ascii=False), encoding="utf-8")
 
 
 def load_manifest(path: Path) -> dict[str, Any]:
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+    with path.open("rb") as f:
+        data = yaml.load(f, Loader=YAML_LOADER)
     if not isinstance(data, dict):
         raise ValueError(f"Manifest must be a mapping: {path}")
     return data
@@ -74,31 +221,25 @@ def load_manifest(path: Path) -> dict[str, Any]:
 def infer_topics(name: str, description: str) -> list[str]:
     text = f"{name} {description}".lower()
     topics: list[str] = []
-    mapping = {
-        "sdk": "sdk",
-        "ros": "ros",
-        "rl": "rl",
-        "sim": "simulation",
-        "isaac": "isaaclab",
-        "mujoco": "mujoco",
-        "dds": "dds",
-        "g1": "g1",
-        "humanoid": "humanoid",
-        "teleoperate": "teleoperation",
-        "reality": "deployment",
-        "real": "deployment",
-        "camera": "sensor",
-        "lidar": "sensor",
-    }
-    for key, topic in mapping.items():
+    for key, topic in TOPIC_KEYWORDS.items():
         if key in text and topic not in topics:
             topics.append(topic)
+            if len(topics) == TOPIC_COUNT:
+                break
     return topics or ["unitree"]
 
 
-def repo_matches(repo: dict[str, Any], keywords: list[str]) -> bool:
+def compile_keywords(keywords: list[str]) -> re.Pattern[str]:
+    # One alternation scans the text once; with no keywords nothing matches,
+    # as any() over an empty list did.
+    if not keywords:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+def repo_matches(repo: dict[str, Any], keyword_re: re.Pattern[str]) -> bool:
     text = f"{repo.get('name', '')} {repo.get('description') or ''}".lower()
-    return any(kw in text for kw in keywords)
+    return keyword_re.search(text) is not None
 
 
 def to_repo_entry(repo: dict[str, Any]) -> dict[str, Any]:
@@ -151,6 +292,22 @@ def parse_args() -> argparse.Namespace:
         default=Path("sources/unitree_org_repo_catalog.json"),
         help="Output JSON catalog of all discovered org repos",
     )
+    parser.add_argument(
+        "--github-token",
+        default=os.environ.get("GITHUB_TOKEN", ""),
+        help="GitHub token; when set, the org listing comes from one GraphQL query per 100 repos",
+    )
+    parser.add_argument(
+        "--etag-cache",
+        type=Path,
+        default=Path("data/snapshots/.github_etags.json"),
+        help="ETag/page cache for conditional GitHub API requests",
+    )
+    parser.add_argument(
+        "--no-etag-cache",
+        action="store_true",
+        help="Fetch every page unconditionally and leave the ETag cache untouched",
+    )
     parser.add_argument(
         "--include-all",
         action="store_true",
@@ -173,21 +330,18 @@ def main() -> int:
     args = parse_args()
     keywords = [k.strip().lower() for k in args.keywords.split(",") if k.strip()]
 
-    all_repos_raw: list[dict[str, Any]] = []
-    for page in range(1, args.max_pages + 1):
-        url = f"https://api.github.com/orgs/{args.org}/repos?per_page=100&page={page}"
+    all_repos_raw: list[dict[str, Any]] | None = None
+    if args.github_token:
         try:
-            data = fetch_json(url)
-        except urlerror.URLError as exc:
-            print(f"[ERROR] Failed to fetch page {page}: {exc}")
-            break
-
-        if not isinstance(data, list) or not data:
-            break
-        all_repos_raw.extend(data)
+            all_repos_raw = fetch_graphql_repos(args.org, args.github_token, args.max_pages)
+        except (urlerror.URLError, ValueError) as exc:
+            print(f"[WARN] GraphQL listing failed, falling back to REST: {exc}")
+    if all_repos_raw is None:
+        all_repos_raw = fetch_rest_repos(args)
 
     all_public = [r for r in all_repos_raw if not bool(r.get("private", False))]
-    matched = [r for r in all_public if repo_matches(r, keywords)]
+    keyword_re = compile_keywords(keywords)
+    matched = [r for r in all_public if repo_matches(r, keyword_re)]
 
     if args.include_all:
         selected_raw = all_public
@@ -210,7 +364,7 @@ def main() -> int:
         "repos": all_catalog,
     }
     args.catalog_out.parent.mkdir(parents=True, exist_ok=True)
-    args.catalog_out.write_text(json.dumps(catalog_payload, indent=2), encoding="utf-8")
+    args.catalog_out.write_bytes(dump_json_bytes(catalog_payload))
     print(f"[OK] Wrote repo catalog: {args.catalog_out}")
 
     snapshot = {
@@ -227,7 +381,7 @@ def main() -> int:
 
     args.snapshot_out.mkdir(parents=True, exist_ok=True)
     out_path = args.snapshot_out / f"repo_discovery_{snapshot['timestamp_unix']}.json"
-    out_path.write_text(json.dumps(snapshot, indent=2), encoding="utf-8")
+    out_path.write_bytes(dump_json_bytes(snapshot))
     print(f"[OK] Wrote discovery snapshot: {out_path}")
 
     if args.update_manifest:
@@ -250,10 +404,15 @@ def main() -> int:
 
         manifest_data["repos"] = [merged[k] for k in sorted(merged.keys(), key=str.lower)]
         manifest_data["updated_at"] = time.strftime("%Y-%m-%d")
-        args.manifest.write_text(
-            yaml.safe_dump(manifest_data, sort_keys=False),
-            encoding="utf-8",
-        )
+        # Dump to a .part file and move it into place, so a failed dump never
+        # leaves the manifest truncated.
+        partial_manifest = args.manifest.with_name(args.manifest.name + ".part")
+        try:
+            with partial_manifest.open("w", encoding="utf-8") as f:
+                yaml.dump(manifest_data, f, Dumper=YAML_DUMPER, sort_keys=False)
+            partial_manifest.replace(args.manifest)
+        finally:
+            partial_manifest.unlink(missing_ok=True)
         print(
             f"[OK] Updated manifest repos: {len(existing)} -> {len(manifest_data['repos'])} "
             f"({len(manifest_data['repos']) - len(existing)} added/updated)"
@@ -9,6 +9,8 @@ import json
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Any
 from urllib import error as urlerror
@@ -21,34 +23,134 @@ except ImportError as exc:  # pragma: no cover - runtime dependency check
         "Missing dependency: pyyaml. Install with `pip install pyyaml`."
     ) from exc
 
+# libyaml-backed loader when PyYAML was built with it; same output, C speed.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+from json_output import dump_json_bytes
+
+
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+HASH_CACHE_NAME = ".hash_cache.json"
+GITHUB_URL_RE = re.compile(r"^https://github\.com/([^/]+)/([^/]+)/?$")
+
 
 def load_manifest(path: Path) -> dict[str, Any]:
-    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    data = yaml.load(path.read_bytes(), Loader=YAML_LOADER)
     if not isinstance(data, dict):
         raise ValueError(f"Manifest must be a mapping: {path}")
     return data
 
 
 def parse_github(url: str) -> tuple[str, str] | None:
-    m = re.match(r"^https://github\.com/([^/]+)/([^/]+)/?$", url.strip())
+    m = GITHUB_URL_RE.match(url.strip())
     if not m:
         return None
     return m.group(1), m.group(2)
 
 
 def sha256(path: Path) -> str:
-    digest = hashlib.sha256()
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            digest.update(chunk)
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+: read/hash loop runs in C
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        buf = bytearray(DOWNLOAD_CHUNK_BYTES)
+        view = memoryview(buf)
+        while n := f.readinto(buf):
+            digest.update(view[:n])
     return digest.hexdigest()
 
 
-def download(url: str, out: Path, timeout: int) -> None:
+def download(url: str, out: Path, timeout: int) -> str:
+    # Streams to a .part file, hashing each chunk on the way, and only moves it
+    # into place once complete so an interrupted fetch never looks cached.
     req = urlrequest.Request(url, headers={"User-Agent": "unitree-g1-doc-archive-sync/1.0"})
-    with urlrequest.urlopen(req, timeout=timeout) as response:
-        payload = response.read()
-    out.write_bytes(payload)
+    digest = hashlib.sha256()
+    partial_out = out.with_name(out.name + ".part")
+    try:
+        with urlrequest.urlopen(req, timeout=timeout) as response, partial_out.open("wb") as f:
+            for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_BYTES), b""):
+                digest.update(chunk)
+                f.write(chunk)
+        partial_out.replace(out)
+    finally:
+        partial_out.unlink(missing_ok=True)
+    return digest.hexdigest()
+
+
+def read_hash_cache(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {}
+    try:
+        raw = path.read_bytes()
+        payload = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def cached_sha256(path: Path, hash_cache: dict[str, Any]) -> str:
+    # Reuses the digest recorded last run when the archive's size and mtime
+    # are unchanged, instead of re-reading the whole tarball.
+    st = path.stat()
+    entry = hash_cache.get(path.name)
+    if (
+        isinstance(entry, dict)
+        and entry.get("size") == st.st_size
+        and entry.get("mtime_ns") == st.st_mtime_ns
+        and entry.get("sha256")
+    ):
+        return str(entry["sha256"])
+    return sha256(path)
+
+
+def process_repo(
+    repo: dict[str, Any],
+    archives_dir: Path,
+    timeout: int,
+    force: bool,
+    hash_cache: dict[str, Any],
+) -> dict[str, Any]:
+    name = str(repo.get("name", "")).strip()
+    url = str(repo.get("url", "")).strip()
+    branch = str(repo.get("branch", "main")).strip() or "main"
+    result: dict[str, Any] = {
+        "name": name,
+        "url": url,
+        "branch": branch,
+        "status": "unknown",
+    }
+
+    parsed = parse_github(url)
+    if not parsed:
+        result["status"] = "skipped"
+        result["reason"] = "non-github-url"
+        return result
+
+    org, repo_name = parsed
+    archive_url = f"https://codeload.github.com/{org}/{repo_name}/tar.gz/refs/heads/{branch}"
+    out = archives_dir / f"{name}-{branch}.tar.gz"
+
+    try:
+        if out.exists() and not force:
+            result["status"] = "cached"
+            digest = cached_sha256(out, hash_cache)
+        else:
+            digest = download(archive_url, out, timeout)
+            result["status"] = "downloaded"
+        result["archive_url"] = archive_url
+        result["file"] = str(out)
+        result["bytes"] = out.stat().st_size
+        result["sha256"] = digest
+    except (urlerror.URLError, TimeoutError, OSError) as exc:
+        result["status"] = "error"
+        result["error"] = str(exc)
+
+    return result
 
 
 def parse_args() -> argparse.Namespace:
@@ -87,6 +189,12 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Exit non-zero if any archive download fails",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Archives downloaded concurrently",
+    )
     return parser.parse_args()
 
 
@@ -102,43 +210,34 @@ def main() -> int:
     if not isinstance(repos, list):
         raise ValueError("manifest repos must be a list")
 
-    for repo in repos:
-        name = str(repo.get("name", "")).strip()
-        url = str(repo.get("url", "")).strip()
-        branch = str(repo.get("branch", "main")).strip() or "main"
-        result: dict[str, Any] = {
-            "name": name,
-            "url": url,
-            "branch": branch,
-            "status": "unknown",
-        }
-
-        parsed = parse_github(url)
-        if not parsed:
-            result["status"] = "skipped"
-            result["reason"] = "non-github-url"
+    hash_cache_path = args.archives_dir / HASH_CACHE_NAME
+    process = partial(
+        process_repo,
+        archives_dir=args.archives_dir,
+        timeout=args.timeout,
+        force=args.force,
+        hash_cache=read_hash_cache(hash_cache_path),
+    )
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for result in pool.map(process, repos):
+            print(f"[ARCHIVE] {result['name']}: {result['status']}")
             results.append(result)
-            continue
-
-        org, repo_name = parsed
-        archive_url = f"https://codeload.github.com/{org}/{repo_name}/tar.gz/refs/heads/{branch}"
-        out = args.archives_dir / f"{name}-{branch}.tar.gz"
 
+    hash_cache: dict[str, Any] = {}
+    for result in results:
+        if not result.get("sha256"):
+            continue
+        archive = Path(result["file"])
         try:
-            if out.exists() and not args.force:
-                result["status"] = "cached"
-            else:
-                download(archive_url, out, args.timeout)
-                result["status"] = "downloaded"
-            result["archive_url"] = archive_url
-            result["file"] = str(out)
-            result["bytes"] = out.stat().st_size
-            result["sha256"] = sha256(out)
-        except (urlerror.URLError, TimeoutError, OSError) as exc:
-            result["status"] = "error"
-            result["error"] = str(exc)
-
-        results.append(result)
+            st = archive.stat()
+        except OSError:
+            continue
+        hash_cache[archive.name] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": result["sha256"],
+        }
+    hash_cache_path.write_bytes(dump_json_bytes(hash_cache))
 
     summary = {
         "manifest": str(args.manifest),
@@ -147,7 +246,7 @@ def main() -> int:
         "repos": results,
     }
     out = args.summary_out / f"repo_archive_summary_{summary['timestamp_unix']}.json"
-    out.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    out.write_bytes(dump_json_bytes(summary))
     print(f"[OK] Wrote archive summary: {out}")
 
     errors = [r for r in results if r.get("status") == "error"]
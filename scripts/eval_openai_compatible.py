@@ -4,12 +4,18 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import mmap
 import os
+import re
 import sys
+import threading
 import time
 import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Any
 
@@ -18,52 +24,68 @@ try:
 except ImportError as exc:  # pragma: no cover - dependency check
     raise SystemExit("Missing dependency: pyyaml. Install with `pip install pyyaml`.") from exc
 
-from retrieval_scoring import Match, rank_records
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
+from json_output import dump_json_bytes
+from retrieval_scoring import Match, RecordIndex
 
-def load_index(path: Path) -> list[dict[str, Any]]:
-    records: list[dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            records.append(json.loads(line))
-    return records
+# Overloaded or rate-limited endpoints get a few retries with exponential backoff.
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+MAX_RETRIES = 3
+RETRY_BACKOFF_SEC = 0.2
 
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a retrieval expert. Output strict JSON only.",
+}
 
-def path_matches_patterns(path: str, patterns: list[str]) -> bool:
-    if not path or not patterns:
-        return False
-    lowered = path.lower()
-    return any(pattern.lower() in lowered for pattern in patterns)
 
+def load_index(path: Path) -> list[dict[str, Any]]:
+    records: list[dict[str, Any]] = []
+    if path.stat().st_size == 0:
+        return records
+    loads = orjson.loads if orjson is not None else json.loads
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter(mm.readline, b""):
+            if line.strip():
+                records.append(loads(line))
+    return records
 
-def filter_leaky_records(
-    records: list[dict[str, Any]],
-    benchmark_path: Path,
-    expected_patterns: list[str],
-) -> list[dict[str, Any]]:
-    bench_rel = benchmark_path.as_posix().lower()
-    bench_abs = benchmark_path.resolve().as_posix().lower()
-    filtered: list[dict[str, Any]] = []
 
+def benchmark_doc_paths(records: list[dict[str, Any]], benchmark: Path) -> set[str]:
+    # The benchmark file itself is indexed; find its records once per run.
+    bench_rel = benchmark.as_posix().lower()
+    bench_abs = benchmark.resolve().as_posix().lower()
+    paths: set[str] = set()
     for record in records:
         path = str(record.get("path", "")).lower()
-        if not path:
-            filtered.append(record)
-            continue
-        is_benchmark_doc = bench_rel in path or bench_abs in path
-        if is_benchmark_doc and not path_matches_patterns(path, expected_patterns):
-            continue
-        filtered.append(record)
+        if path and (bench_rel in path or bench_abs in path):
+            paths.add(path)
+    return paths
+
 
-    return filtered
+def is_leaky_record(
+    record: dict[str, Any],
+    bench_paths: set[str],
+    expected_lower: list[str],
+) -> bool:
+    # Hide benchmark-file records unless the case expects them.
+    path = str(record.get("path", "")).lower()
+    return path in bench_paths and not any(pattern in path for pattern in expected_lower)
 
 
 def shrink(text: str, max_chars: int = 220) -> str:
-    clean = " ".join(text.split())
-    return clean[:max_chars]
+    # Collapse whitespace in a growing prefix only; once it yields max_chars,
+    # it is a prefix of the fully collapsed text.
+    end = max_chars * 2
+    while True:
+        clean = " ".join(text[:end].split())
+        if len(clean) >= max_chars or end >= len(text):
+            return clean[:max_chars]
+        end *= 2
 
 
 def unique_candidates(matches: list[Match], max_candidates: int) -> list[dict[str, Any]]:
@@ -98,38 +120,76 @@ def normalize_api_base(api_base: str) -> str:
     return f"{base}/v1/chat/completions"
 
 
+def response_cache_path(cache_dir: Path, endpoint: str, model: str, data: bytes) -> Path:
+    # One directory per model; the hash covers the endpoint as well as the
+    # request body, so two servers serving the same model name never share
+    # entries.
+    key = hashlib.sha256(endpoint.encode("utf-8") + b"\n" + data).hexdigest()
+    model_dir = re.sub(r"[^A-Za-z0-9._-]+", "_", model).strip(".") or "_"
+    return cache_dir / model_dir / f"{key}.json"
+
+
+def read_cached_response(path: Path) -> str | None:
+    try:
+        content = json.loads(path.read_bytes()).get("content")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return content if isinstance(content, str) else None
+
+
+def write_cached_response(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.part")
+    tmp.write_text(json.dumps({"content": content}), encoding="utf-8")
+    tmp.replace(path)
+
+
 def call_chat(
     *,
-    api_base: str,
+    endpoint: str,
     api_key: str,
     model: str,
     messages: list[dict[str, str]],
     temperature: float,
     timeout_sec: int,
+    cache_dir: Path | None = None,
 ) -> str:
-    endpoint = normalize_api_base(api_base)
     payload = {
         "model": model,
         "messages": messages,
         "temperature": temperature,
     }
+    data = orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode("utf-8")
+    cache_path = response_cache_path(cache_dir, endpoint, model, data) if cache_dir else None
+    if cache_path is not None:
+        cached = read_cached_response(cache_path)
+        if cached is not None:
+            return cached
+
     req = urllib.request.Request(
         endpoint,
-        data=json.dumps(payload).encode("utf-8"),
+        data=data,
         headers={
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}",
         },
         method="POST",
     )
-    try:
-        with urllib.request.urlopen(req, timeout=timeout_sec) as resp:
-            body = resp.read().decode("utf-8")
-    except urllib.error.HTTPError as exc:
-        err = exc.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"HTTP {exc.code} from model endpoint: {err}") from exc
-    except urllib.error.URLError as exc:
-        raise RuntimeError(f"Failed to reach model endpoint: {exc}") from exc
+    attempt = 0
+    while True:
+        try:
+            with urllib.request.urlopen(req, timeout=timeout_sec) as resp:
+                body = resp.read().decode("utf-8")
+            break
+        except urllib.error.HTTPError as exc:
+            err = exc.read().decode("utf-8", errors="replace")
+            if exc.code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+                time.sleep(RETRY_BACKOFF_SEC * 2**attempt)
+                attempt += 1
+                continue
+            raise RuntimeError(f"HTTP {exc.code} from model endpoint: {err}") from exc
+        except urllib.error.URLError as exc:
+            raise RuntimeError(f"Failed to reach model endpoint: {exc}") from exc
 
     parsed = json.loads(body)
     choices = parsed.get("choices", [])
@@ -138,18 +198,21 @@ def call_chat(
     content = choices[0].get("message", {}).get("content", "")
     if not isinstance(content, str):
         raise RuntimeError(f"Unexpected completion format: {body[:400]}")
+    if cache_path is not None:
+        write_cached_response(cache_path, content)
     return content
 
 
 def parse_model_json(text: str) -> dict[str, Any]:
     raw = text.strip()
     if raw.startswith("```"):
-        raw = raw.strip("`")
-        if raw.startswith("json"):
-            raw = raw[4:].strip()
+        # Drop only the fence, not backticks that belong to the JSON itself.
+        raw = raw.removeprefix("```").removesuffix("```").strip()
+        raw = raw.removeprefix("json").strip()
 
+    loads = orjson.loads if orjson is not None else json.loads
     try:
-        parsed = json.loads(raw)
+        parsed = loads(raw)
         if isinstance(parsed, dict):
             return parsed
     except json.JSONDecodeError:
@@ -158,35 +221,87 @@ def parse_model_json(text: str) -> dict[str, Any]:
     start = raw.find("{")
     end = raw.rfind("}")
     if start >= 0 and end > start:
-        parsed = json.loads(raw[start : end + 1])
+        parsed = loads(raw[start : end + 1])
         if isinstance(parsed, dict):
             return parsed
 
     raise ValueError("Model response is not valid JSON object")
 
 
-def match_patterns(values: list[str], patterns: list[str]) -> tuple[int, int]:
-    if not values or not patterns:
-        return 0, len(patterns)
-    hits = 0
-    lowered_values = [v.lower() for v in values]
-    for pat in patterns:
-        p = pat.lower()
-        if any(p in val for val in lowered_values):
-            hits += 1
-    return hits, len(patterns)
-
-
-def count_selected_relevant(values: list[str], patterns: list[str]) -> int:
-    if not values or not patterns:
-        return 0
-    lowered_patterns = [p.lower() for p in patterns]
-    count = 0
-    for value in values:
-        v = value.lower()
-        if any(p in v for p in lowered_patterns):
-            count += 1
-    return count
+def match_patterns(lowered_values: list[str], lowered_patterns: list[str]) -> tuple[int, int, int]:
+    # (patterns hit by any value, pattern count, values hitting any pattern);
+    # callers lower both sides once per case.
+    if not lowered_values or not lowered_patterns:
+        return 0, len(lowered_patterns), 0
+    hits = sum(1 for p in lowered_patterns if any(p in v for v in lowered_values))
+    relevant = sum(1 for v in lowered_values if any(p in v for p in lowered_patterns))
+    return hits, len(lowered_patterns), relevant
+
+
+def evaluate_case(
+    job: tuple[dict[str, Any], list[dict[str, str]], list[str], list[str]],
+    args: argparse.Namespace,
+    endpoint: str,
+) -> tuple[dict[str, Any], float, float]:
+    case_out, messages, expected_lower, forbidden_lower = job
+    require_all_expected = case_out["require_all_expected"]
+    max_forbidden_hits = case_out["max_forbidden_hits"]
+    try:
+        raw = call_chat(
+            endpoint=endpoint,
+            api_key=args.api_key,
+            model=args.model,
+            messages=messages,
+            temperature=args.temperature,
+            timeout_sec=args.timeout_sec,
+            cache_dir=None if args.no_cache else args.cache_dir,
+        )
+        parsed = parse_model_json(raw)
+        selected = parsed.get("selected_paths", [])
+        if not isinstance(selected, list):
+            raise ValueError("selected_paths must be a list")
+        selected_paths = [str(x) for x in selected if str(x).strip()]
+        if len(selected_paths) > args.select_k:
+            selected_paths = selected_paths[: args.select_k]
+
+        selected_lower = [path.lower() for path in selected_paths]
+        matched_expected, expected_total, selected_relevant = match_patterns(selected_lower, expected_lower)
+        matched_forbidden, _, _ = match_patterns(selected_lower, forbidden_lower)
+
+        recall = (matched_expected / expected_total) if expected_total else 1.0
+        precision = (selected_relevant / len(selected_paths)) if selected_paths else 0.0
+        expected_ok = (
+            matched_expected == expected_total if require_all_expected else matched_expected > 0
+        ) if expected_total else True
+        forbidden_ok = matched_forbidden <= max_forbidden_hits
+        passed = expected_ok and forbidden_ok
+
+        case_out.update(
+            {
+                "pass": passed,
+                "selected_paths": selected_paths,
+                "rationale": parsed.get("rationale", ""),
+                "precision": round(precision, 4),
+                "recall": round(recall, 4),
+                "matched_expected": matched_expected,
+                "expected_total": expected_total,
+                "matched_forbidden": matched_forbidden,
+                "raw_response": raw[:1200],
+            }
+        )
+        return case_out, precision, recall
+    except Exception as exc:  # pragma: no cover - endpoint/model variance
+        case_out.update(
+            {
+                "pass": False,
+                "selected_paths": [],
+                "precision": 0.0,
+                "recall": 0.0,
+                "matched_forbidden": 0,
+                "error": str(exc),
+            }
+        )
+        return case_out, 0.0, 0.0
 
 
 def parse_args() -> argparse.Namespace:
@@ -226,6 +341,14 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--select-k", type=int, default=3, help="Expected number of selected paths")
     parser.add_argument("--temperature", type=float, default=0.0, help="Model temperature")
     parser.add_argument("--timeout-sec", type=int, default=60, help="HTTP timeout in seconds")
+    parser.add_argument("--concurrency", type=int, default=8, help="Model requests in flight at once")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path("data/cache/agent_eval"),
+        help="Directory for cached model responses keyed by request hash",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always query the model endpoint")
     parser.add_argument("--max-cases", type=int, default=0, help="Limit number of benchmark cases (0=all)")
     parser.add_argument(
         "--json-out",
@@ -253,11 +376,20 @@ def main() -> int:
     if not isinstance(bench, dict) or not isinstance(bench.get("cases"), list):
         raise ValueError("Invalid benchmark format")
 
-    records = load_index(args.index)
+    index = RecordIndex(load_index(args.index))
+    bench_paths = benchmark_doc_paths(index.records, args.benchmark)
     cases = list(bench["cases"])
     if args.max_cases > 0:
         cases = cases[: args.max_cases]
 
+    prompt_header = (
+        "Select the most relevant source paths for this Unitree G1 question.\n"
+        "Return JSON only with schema: "
+        '{"selected_paths": ["..."], "rationale": "..."}.\n'
+        f"Choose at most {args.select_k} paths and only from the candidate list.\n\n"
+        "Question:"
+    )
+    jobs: list[tuple[dict[str, Any], list[dict[str, str]], list[str], list[str]]] = []
     results: list[dict[str, Any]] = []
     pass_count = 0
     precision_sum = 0.0
@@ -271,34 +403,29 @@ def main() -> int:
         require_all_expected = bool(case.get("require_all_expected", False))
         max_forbidden_hits = int(case.get("max_forbidden_hits", 0 if forbidden else 999999))
 
-        eval_records = filter_leaky_records(records, args.benchmark, expected)
-        ranked = rank_records(records=eval_records, query=query, top_k=args.top_k)
+        expected_lower = [pattern.lower() for pattern in expected]
+        forbidden_lower = [pattern.lower() for pattern in forbidden]
+
+        leaky = None
+        if bench_paths:
+            leaky = partial(is_leaky_record, bench_paths=bench_paths, expected_lower=expected_lower)
+        ranked = index.rank(query=query, top_k=args.top_k, exclude=leaky)
         candidates = unique_candidates(ranked, args.candidates)
 
-        candidate_lines: list[str] = []
+        prompt_parts = [prompt_header, query, "", "Candidates:"]
         for idx, c in enumerate(candidates, start=1):
-            candidate_lines.append(
+            prompt_parts.append(
                 f"{idx}. path={c['path']} | type={c['type']} | title={c['title']} | snippet={c['snippet']}"
             )
-
-        user_prompt = (
-            "Select the most relevant source paths for this Unitree G1 question.\n"
-            "Return JSON only with schema: "
-            '{"selected_paths": ["..."], "rationale": "..."}.\n'
-            f"Choose at most {args.select_k} paths and only from the candidate list.\n\n"
-            f"Question:\n{query}\n\n"
-            "Candidates:\n"
-            + "\n".join(candidate_lines)
-        )
+        if not candidates:
+            # Keep the trailing newline after the header when the list is empty.
+            prompt_parts.append("")
 
         messages = [
-            {
-                "role": "system",
-                "content": "You are a retrieval expert. Output strict JSON only.",
-            },
+            SYSTEM_MESSAGE,
             {
                 "role": "user",
-                "content": user_prompt,
+                "content": "\n".join(prompt_parts),
             },
         ]
 
@@ -311,66 +438,18 @@ def main() -> int:
             "max_forbidden_hits": max_forbidden_hits,
             "candidates": candidates,
         }
-        try:
-            raw = call_chat(
-                api_base=args.api_base,
-                api_key=args.api_key,
-                model=args.model,
-                messages=messages,
-                temperature=args.temperature,
-                timeout_sec=args.timeout_sec,
-            )
-            parsed = parse_model_json(raw)
-            selected = parsed.get("selected_paths", [])
-            if not isinstance(selected, list):
-                raise ValueError("selected_paths must be a list")
-            selected_paths = [str(x) for x in selected if str(x).strip()]
-            if len(selected_paths) > args.select_k:
-                selected_paths = selected_paths[: args.select_k]
-
-            matched_expected, expected_total = match_patterns(selected_paths, expected)
-            matched_forbidden, _ = match_patterns(selected_paths, forbidden)
-            selected_relevant = count_selected_relevant(selected_paths, expected)
-
-            recall = (matched_expected / expected_total) if expected_total else 1.0
-            precision = (selected_relevant / len(selected_paths)) if selected_paths else 0.0
-            expected_ok = (
-                matched_expected == expected_total if require_all_expected else matched_expected > 0
-            ) if expected_total else True
-            forbidden_ok = matched_forbidden <= max_forbidden_hits
-            passed = expected_ok and forbidden_ok
-
-            pass_count += 1 if passed else 0
+        jobs.append((case_out, messages, expected_lower, forbidden_lower))
+
+    # Model calls are network-bound; run them concurrently and collect the
+    # results in benchmark order.
+    evaluate = partial(evaluate_case, args=args, endpoint=normalize_api_base(args.api_base))
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        for i, (case_out, precision, recall) in enumerate(pool.map(evaluate, jobs), start=1):
+            pass_count += 1 if case_out["pass"] else 0
             precision_sum += precision
             recall_sum += recall
-
-            case_out.update(
-                {
-                    "pass": passed,
-                    "selected_paths": selected_paths,
-                    "rationale": parsed.get("rationale", ""),
-                    "precision": round(precision, 4),
-                    "recall": round(recall, 4),
-                    "matched_expected": matched_expected,
-                    "expected_total": expected_total,
-                    "matched_forbidden": matched_forbidden,
-                    "raw_response": raw[:1200],
-                }
-            )
-        except Exception as exc:  # pragma: no cover - endpoint/model variance
-            case_out.update(
-                {
-                    "pass": False,
-                    "selected_paths": [],
-                    "precision": 0.0,
-                    "recall": 0.0,
-                    "matched_forbidden": 0,
-                    "error": str(exc),
-                }
-            )
-
-        results.append(case_out)
-        print(f"[{i}/{len(cases)}] {cid}: pass={case_out['pass']}")
+            results.append(case_out)
+            print(f"[{i}/{len(cases)}] {case_out['id']}: pass={case_out['pass']}")
 
     total = len(results)
     pass_rate = (pass_count / total) if total else 0.0
@@ -396,7 +475,7 @@ def main() -> int:
     }
 
     args.json_out.parent.mkdir(parents=True, exist_ok=True)
-    args.json_out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    args.json_out.write_bytes(dump_json_bytes(report))
 
     lines = [
         "# Agent Source-Selection Evaluation",
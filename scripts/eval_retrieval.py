@@ -5,8 +5,10 @@ from __future__ import annotations
 
 import argparse
 import json
+import mmap
 import sys
 import time
+from functools import partial
 from pathlib import Path
 from typing import Any
 
@@ -15,47 +17,46 @@ try:
 except ImportError as exc:  # pragma: no cover - dependency check
     raise SystemExit("Missing dependency: pyyaml. Install with `pip install pyyaml`.") from exc
 
-from retrieval_scoring import Match, rank_records
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+from retrieval_scoring import Match, RecordIndex
 
 
 def load_index(path: Path) -> list[dict[str, Any]]:
     records: list[dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            records.append(json.loads(line))
+    if path.stat().st_size == 0:
+        return records
+    loads = orjson.loads if orjson is not None else json.loads
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter(mm.readline, b""):
+            if line.strip():
+                records.append(loads(line))
     return records
 
 
-def path_matches_patterns(path: str, patterns: list[str]) -> bool:
-    if not path or not patterns:
-        return False
-    lowered = path.lower()
-    return any(pattern.lower() in lowered for pattern in patterns)
-
-
-def filter_leaky_records(
-    records: list[dict[str, Any]],
-    benchmark_path: Path,
-    expected_patterns: list[str],
-) -> list[dict[str, Any]]:
-    bench_rel = benchmark_path.as_posix().lower()
-    bench_abs = benchmark_path.resolve().as_posix().lower()
-    filtered: list[dict[str, Any]] = []
-
+def benchmark_doc_paths(records: list[dict[str, Any]], benchmark: Path) -> set[str]:
+    # The benchmark file itself is indexed; find its records once per run.
+    bench_rel = benchmark.as_posix().lower()
+    bench_abs = benchmark.resolve().as_posix().lower()
+    paths: set[str] = set()
     for record in records:
         path = str(record.get("path", "")).lower()
-        if not path:
-            filtered.append(record)
-            continue
-        is_benchmark_doc = bench_rel in path or bench_abs in path
-        if is_benchmark_doc and not path_matches_patterns(path, expected_patterns):
-            continue
-        filtered.append(record)
+        if path and (bench_rel in path or bench_abs in path):
+            paths.add(path)
+    return paths
+
 
-    return filtered
+def is_leaky_record(
+    record: dict[str, Any],
+    bench_paths: set[str],
+    expected_lower: list[str],
+) -> bool:
+    # Hide benchmark-file records unless the case expects them.
+    path = str(record.get("path", "")).lower()
+    return path in bench_paths and not any(pattern in path for pattern in expected_lower)
 
 
 def dedupe_matches(matches: list[Match], top_k: int) -> list[Match]:
@@ -75,17 +76,22 @@ def dedupe_matches(matches: list[Match], top_k: int) -> list[Match]:
     return deduped
 
 
-def match_pattern_rank(results: list[Match], pattern: str) -> int | None:
+def match_pattern_rank(targets: list[str], pattern: str) -> int | None:
     needle = pattern.lower()
-    for idx, item in enumerate(results, start=1):
-        path = str(item.record.get("path", ""))
-        url = str(item.record.get("url", ""))
-        target = f"{path}\n{url}".lower()
+    for idx, target in enumerate(targets, start=1):
         if needle in target:
             return idx
     return None
 
 
+def match_targets(results: list[Match]) -> list[str]:
+    # Lowered "path\nurl" per result, built once and shared by every pattern.
+    return [
+        f"{item.record.get('path', '')}\n{item.record.get('url', '')}".lower()
+        for item in results
+    ]
+
+
 def evaluate_case_matches(
     *,
     results: list[Match],
@@ -94,15 +100,16 @@ def evaluate_case_matches(
     require_all_expected: bool,
     max_forbidden_hits: int,
 ) -> tuple[bool, str, int, int, int]:
+    targets = match_targets(results)
     expected_ranks: dict[str, int] = {}
     for pattern in expected_patterns:
-        rank = match_pattern_rank(results, pattern)
+        rank = match_pattern_rank(targets, pattern)
         if rank is not None:
             expected_ranks[pattern] = rank
 
     forbidden_ranks: dict[str, int] = {}
     for pattern in forbidden_patterns:
-        rank = match_pattern_rank(results, pattern)
+        rank = match_pattern_rank(targets, pattern)
         if rank is not None:
             forbidden_ranks[pattern] = rank
 
@@ -183,7 +190,8 @@ def main() -> int:
     if not isinstance(bench, dict) or not isinstance(bench.get("cases"), list):
         raise ValueError("Invalid benchmark format")
 
-    records = load_index(args.index)
+    index = RecordIndex(load_index(args.index))
+    bench_paths = benchmark_doc_paths(index.records, args.benchmark)
     cases = bench["cases"]
 
     results_payload: list[dict[str, Any]] = []
@@ -197,8 +205,11 @@ def main() -> int:
         require_all_expected = bool(case.get("require_all_expected", False))
         max_forbidden_hits = int(case.get("max_forbidden_hits", 0 if forbidden else 999999))
 
-        eval_records = filter_leaky_records(records, args.benchmark, expected)
-        ranked_raw = rank_records(records=eval_records, query=query, top_k=args.top_k * 6)
+        expected_lower = [str(pattern).lower() for pattern in expected]
+        leaky = None
+        if bench_paths:
+            leaky = partial(is_leaky_record, bench_paths=bench_paths, expected_lower=expected_lower)
+        ranked_raw = index.rank(query=query, top_k=args.top_k * 6, exclude=leaky)
         ranked = dedupe_matches(ranked_raw, args.top_k)
         ok, reason, matched_expected, expected_total, forbidden_hits = evaluate_case_matches(
             results=ranked,
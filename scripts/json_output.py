@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Shared indented-JSON writer for the report and snapshot scripts."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dump_json_bytes(payload: Any, *, ensure_ascii: bool = True) -> bytes:
+    """Encode payload like json.dumps(payload, indent=2, ensure_ascii=...).
+
+    orjson is used when installed. With ensure_ascii, its output is only kept
+    when it is pure ASCII; anything that would need \\u escapes, and payloads
+    orjson rejects (non-str keys, ints beyond 64 bits), go through json.dumps.
+    The remaining differences under orjson are floats: NaN/Infinity are
+    written as null, and values below 1e-4 or from 1e16 up use a short
+    exponent (1e-5, 1e16 rather than 1e-05, 1e+16).
+    """
+    if orjson is not None:
+        try:
+            data = orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            data = None
+        if data is not None and (not ensure_ascii or data.isascii()):
+            return data
+    return json.dumps(payload, ensure_ascii=ensure_ascii, indent=2).encode("utf-8")
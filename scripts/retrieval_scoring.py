@@ -3,12 +3,18 @@
 
 from __future__ import annotations
 
+import heapq
 import re
 from collections import Counter
 from dataclasses import dataclass
-from typing import Any, Iterable
+from functools import lru_cache
+from typing import Any, Callable, Iterable
 
 TOKEN_RE = re.compile(r"[a-zA-Z0-9_]+")
+# Maps every ASCII character outside TOKEN_RE's class to a space.
+TOKEN_DELIMITERS = str.maketrans(
+    {chr(code): " " for code in range(128) if not (chr(code).isalnum() or chr(code) == "_")}
+)
 
 STOPWORDS = {
     "a",
@@ -162,25 +168,69 @@ SOURCE_BOOST = {
 }
 
 
+# __slots__ is spelled out because dataclass(slots=True) needs Python 3.10.
 @dataclass
 class Match:
+    __slots__ = ("score", "record")
+
     score: float
     record: dict[str, Any]
 
 
+@dataclass
+class RecordFeatures:
+    # Query-independent parts of score_record, computed once per record.
+    __slots__ = (
+        "content",
+        "title",
+        "path",
+        "source_type",
+        "scorable",
+        "all_tokens",
+        "path_tokens",
+        "term_counts",
+        "source_boost",
+        "path_boost",
+        "noisy",
+    )
+
+    content: str
+    title: str
+    path: str
+    source_type: str
+    scorable: bool
+    all_tokens: set[str]
+    path_tokens: set[str]
+    # token -> (content, title, tag, path) counts, already capped at the
+    # per-field limits score_record applies; keyed by every token in all_tokens.
+    term_counts: dict[str, tuple[int, int, int, int]]
+    source_boost: float
+    path_boost: float
+    noisy: bool
+
+
 def tokenize(text: str) -> list[str]:
-    return TOKEN_RE.findall(text.lower())
+    lowered = text.lower()
+    if lowered.isascii():
+        # translate + split stay in C and give the same tokens as TOKEN_RE.
+        return lowered.translate(TOKEN_DELIMITERS).split()
+    return TOKEN_RE.findall(lowered)
 
 
 def normalize_query_tokens(query: str) -> list[str]:
+    return list(_normalized_query_tokens(query))
+
+
+@lru_cache(maxsize=4096)
+def _normalized_query_tokens(query: str) -> tuple[str, ...]:
     raw = tokenize(query)
     if not raw:
-        return []
-    filtered = [tok for tok in raw if len(tok) > 1 and tok not in STOPWORDS]
+        return ()
+    filtered = tuple(tok for tok in raw if len(tok) > 1 and tok not in STOPWORDS)
     if filtered:
         return filtered
-    fallback = [tok for tok in raw if len(tok) > 1]
-    return fallback or raw
+    fallback = tuple(tok for tok in raw if len(tok) > 1)
+    return fallback or tuple(raw)
 
 
 def classify_query_intent(query_tokens: list[str]) -> set[str]:
@@ -214,57 +264,121 @@ def _path_has_noise(path: str, title: str) -> bool:
     return path.endswith("/license") or path.endswith("/license.txt")
 
 
-def score_record(
-    *,
-    query_tokens: list[str],
-    query_intents: set[str],
-    record: dict[str, Any],
-) -> float:
-    if not query_tokens:
-        return 0.0
-
+def _path_boost(path: str) -> float:
+    path_boost = 1.0
+    if path == "agents.md":
+        path_boost *= 2.0
+    elif path.startswith("skills/unitree-g1-expert"):
+        path_boost *= 1.7
+    elif path.startswith("docs/verification"):
+        path_boost *= 1.35
+    elif path.startswith("scripts/"):
+        path_boost *= 1.30
+    elif path.startswith("benchmarks/"):
+        path_boost *= 1.25
+    elif path.startswith("site/"):
+        path_boost *= 1.20
+    elif path.startswith("sources/"):
+        path_boost *= 1.25
+    return path_boost
+
+
+def _term_counts(
+    content_tokens: list[str],
+    title_tokens: list[str],
+    tag_tokens: list[str],
+    path_tokens: list[str],
+) -> dict[str, tuple[int, int, int, int]]:
+    # Content carries nearly all tokens; the short fields are patched in after.
+    term_counts = {tok: (min(count, 5), 0, 0, 0) for tok, count in Counter(content_tokens).items()}
+    for field, tokens, cap in ((1, title_tokens, 3), (2, tag_tokens, 2), (3, path_tokens, 3)):
+        for tok, count in Counter(tokens).items():
+            counts = list(term_counts.get(tok, (0, 0, 0, 0)))
+            counts[field] = min(count, cap)
+            term_counts[tok] = tuple(counts)
+    return term_counts
+
+
+def record_features(record: dict[str, Any]) -> RecordFeatures:
+    """Return the record's scoring features; the record is not modified.
+
+    RecordIndex keeps these for its records, so benchmark runs that score the
+    same records for many queries tokenize each one only once.
+    """
     content = str(record.get("content", "")).lower()
     title = str(record.get("title", "")).lower()
     tags = " ".join(str(item) for item in record.get("tags", [])).lower()
     path = str(record.get("path", "")).lower()
     source_type = str(record.get("source_type", "")).lower()
 
-    if not content and not title and not path:
-        return 0.0
-
     content_tokens = tokenize(content)
     title_tokens = tokenize(title)
     tag_tokens = tokenize(tags)
     path_tokens = tokenize(path)
-    if not content_tokens and not title_tokens and not path_tokens:
+    scorable = bool(content or title or path) and bool(content_tokens or title_tokens or path_tokens)
+
+    source_boost = SOURCE_BOOST.get(source_type, 1.0)
+    record_tags = {str(tag).lower() for tag in record.get("tags", [])}
+    if "support_unverified" in record_tags:
+        source_boost *= 0.35
+
+    term_counts = _term_counts(content_tokens, title_tokens, tag_tokens, path_tokens)
+    return RecordFeatures(
+        content=content,
+        title=title,
+        path=path,
+        source_type=source_type,
+        scorable=scorable,
+        all_tokens=set(term_counts),
+        path_tokens=set(path_tokens),
+        term_counts=term_counts,
+        source_boost=source_boost,
+        path_boost=_path_boost(path),
+        noisy=_path_has_noise(path, title),
+    )
+
+
+def score_record(
+    *,
+    query_tokens: list[str],
+    query_intents: set[str],
+    record: dict[str, Any],
+    features: RecordFeatures | None = None,
+) -> float:
+    if not query_tokens:
+        return 0.0
+
+    if features is None:
+        features = record_features(record)
+    if not features.scorable:
         return 0.0
 
+    content = features.content
+    path = features.path
+    source_type = features.source_type
+
     query_set = set(query_tokens)
     if not query_set:
         return 0.0
 
-    content_set = set(content_tokens)
-    title_set = set(title_tokens)
-    tag_set = set(tag_tokens)
-    path_set = set(path_tokens)
-
-    overlap_all = query_set & (content_set | title_set | tag_set | path_set)
+    overlap_all = query_set & features.all_tokens
     if not overlap_all:
         return 0.0
 
     coverage = len(overlap_all) / max(len(query_set), 1)
-    path_overlap = query_set & path_set
+    path_overlap = query_set & features.path_tokens
     path_coverage = len(path_overlap) / max(len(query_set), 1)
 
-    content_count = Counter(content_tokens)
-    title_count = Counter(title_tokens)
-    tag_count = Counter(tag_tokens)
-    path_count = Counter(path_tokens)
-
-    content_hits = sum(min(content_count.get(tok, 0), 5) for tok in query_set)
-    title_hits = sum(min(title_count.get(tok, 0), 3) for tok in query_set)
-    tag_hits = sum(min(tag_count.get(tok, 0), 2) for tok in query_set)
-    path_hits = sum(min(path_count.get(tok, 0), 3) for tok in query_set)
+    # Only overlapping tokens have non-zero counts; integer sums, so the
+    # iteration order cannot change the score.
+    content_hits = title_hits = tag_hits = path_hits = 0
+    term_counts = features.term_counts
+    for tok in overlap_all:
+        content_c, title_c, tag_c, path_c = term_counts[tok]
+        content_hits += content_c
+        title_hits += title_c
+        tag_hits += tag_c
+        path_hits += path_c
 
     phrase_bonus = 0.0
     phrase = " ".join(query_tokens[:3])
@@ -284,26 +398,8 @@ def score_record(
         + phrase_bonus
     )
 
-    source_boost = SOURCE_BOOST.get(source_type, 1.0)
-    record_tags = {str(tag).lower() for tag in record.get("tags", [])}
-    if "support_unverified" in record_tags:
-        source_boost *= 0.35
-
-    path_boost = 1.0
-    if path == "agents.md":
-        path_boost *= 2.0
-    elif path.startswith("skills/unitree-g1-expert"):
-        path_boost *= 1.7
-    elif path.startswith("docs/verification"):
-        path_boost *= 1.35
-    elif path.startswith("scripts/"):
-        path_boost *= 1.30
-    elif path.startswith("benchmarks/"):
-        path_boost *= 1.25
-    elif path.startswith("site/"):
-        path_boost *= 1.20
-    elif path.startswith("sources/"):
-        path_boost *= 1.25
+    source_boost = features.source_boost
+    path_boost = features.path_boost
 
     intent_boost = 1.0
     if "codex" in query_intents:
@@ -358,21 +454,20 @@ def score_record(
     if source_type == "site_data" and "site" in query_intents:
         intent_boost *= 1.5
 
-    token_set = set(query_tokens)
-    if {"ros2", "low", "level"} & token_set and path.startswith("data/repos/unitree_ros2/"):
+    if {"ros2", "low", "level"} & query_set and path.startswith("data/repos/unitree_ros2/"):
         intent_boost *= 1.9
 
-    if {"payload", "website", "site"} & token_set:
+    if {"payload", "website", "site"} & query_set:
         if path == "site/data/benchmark_examples.json":
             intent_boost *= 2.4
         elif path == "scripts/build_site.py":
             intent_boost *= 1.9
 
-    if {"catalog", "manifest"} & token_set and path.startswith("sources/"):
+    if {"catalog", "manifest"} & query_set and path.startswith("sources/"):
         intent_boost *= 2.0
 
     noise_penalty = 1.0
-    if _path_has_noise(path, title):
+    if features.noisy:
         noise_penalty *= 0.25
 
     if len(query_set) >= 4 and coverage < 0.20:
@@ -381,27 +476,76 @@ def score_record(
     return raw_score * source_boost * path_boost * intent_boost * noise_penalty
 
 
-def rank_records(
-    *,
-    records: Iterable[dict[str, Any]],
-    query: str,
+def _rank_tokens(
+    query_tokens: list[str],
+    scored: Iterable[tuple[dict[str, Any], RecordFeatures | None]],
     top_k: int,
-    source_filters: set[str] | None = None,
+    source_filters: set[str] | None,
 ) -> list[Match]:
-    query_tokens = normalize_query_tokens(query)
     intents = classify_query_intent(query_tokens)
 
     ranked: list[Match] = []
-    for record in records:
+    for record, features in scored:
         if source_filters and str(record.get("source_type", "")) not in source_filters:
             continue
         score = score_record(
             query_tokens=query_tokens,
             query_intents=intents,
             record=record,
+            features=features,
         )
         if score > 0:
             ranked.append(Match(score=score, record=record))
 
-    ranked.sort(key=lambda item: item.score, reverse=True)
-    return ranked[:top_k]
+    # Same result as a stable descending sort sliced to top_k, in O(n log k).
+    return heapq.nlargest(top_k, ranked, key=lambda item: item.score)
+
+
+def rank_records(
+    *,
+    records: Iterable[dict[str, Any]],
+    query: str,
+    top_k: int,
+    source_filters: set[str] | None = None,
+) -> list[Match]:
+    scored = ((record, None) for record in records)
+    return _rank_tokens(normalize_query_tokens(query), scored, top_k, source_filters)
+
+
+class RecordIndex:
+    """Token -> record postings for ranking many queries over one record set.
+
+    A record only scores above zero when it shares a token with the query, so
+    rank() scores just the records on the query tokens' posting lists, in their
+    original order, and returns exactly what rank_records() would. Posting
+    lists are built on first use of a token, since a benchmark run only ever
+    asks for a few hundred of the index's tokens. Record features are kept in
+    a list parallel to records; the records themselves are left untouched.
+    """
+
+    def __init__(self, records: Iterable[dict[str, Any]]) -> None:
+        self.records = list(records)
+        self.features = [record_features(record) for record in self.records]
+        self.postings: dict[str, list[int]] = {}
+
+    def _postings(self, token: str) -> list[int]:
+        positions = self.postings.get(token)
+        if positions is None:
+            positions = [pos for pos, features in enumerate(self.features) if token in features.all_tokens]
+            self.postings[token] = positions
+        return positions
+
+    def rank(
+        self,
+        *,
+        query: str,
+        top_k: int,
+        source_filters: set[str] | None = None,
+        exclude: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> list[Match]:
+        query_tokens = normalize_query_tokens(query)
+        positions = sorted(set().union(*(self._postings(tok) for tok in query_tokens)))
+        candidates = ((self.records[pos], self.features[pos]) for pos in positions)
+        if exclude is not None:
+            candidates = (item for item in candidates if not exclude(item[0]))
+        return _rank_tokens(query_tokens, candidates, top_k, source_filters)
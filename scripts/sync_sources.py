@@ -22,6 +22,10 @@ except ImportError as exc:  # pragma: no cover - runtime dependency check
         "Missing dependency: pyyaml. Install with `pip install pyyaml`."
     ) from exc
 
+# Script/style blocks and remaining tags removed in a single scan.
+HTML_NOISE_RE = re.compile(r"(?is)<script.*?>.*?</script>|<style.*?>.*?</style>|<[^>]+>")
+TITLE_RE = re.compile(r"(?is)<title>(.*?)</title>")
+
 
 def load_manifest(path: Path) -> dict[str, Any]:
     with path.open("r", encoding="utf-8") as f:
@@ -75,16 +79,13 @@ def update_repo(repo: dict[str, Any], repos_dir: Path, depth: int | None) -> dic
 
 
 def strip_html_text(raw_html: str) -> str:
-    no_script = re.sub(r"(?is)<script.*?>.*?</script>", " ", raw_html)
-    no_style = re.sub(r"(?is)<style.*?>.*?</style>", " ", no_script)
-    no_tags = re.sub(r"(?s)<[^>]+>", " ", no_style)
-    text = html.unescape(no_tags)
-    return re.sub(r"\s+", " ", text).strip()
+    no_tags = HTML_NOISE_RE.sub(" ", raw_html)
+    return " ".join(html.unescape(no_tags).split())
 
 
 def extract_title(raw_html: str) -> str:
-    match = re.search(r"(?is)<title>(.*?)</title>", raw_html)
-    return re.sub(r"\s+", " ", html.unescape(match.group(1))).strip() if match else ""
+    match = TITLE_RE.search(raw_html)
+    return " ".join(html.unescape(match.group(1)).split()) if match else ""
 
 
 def is_access_blocked(text: str, title: str) -> bool: